@@ -254,5 +254,45 @@ TEST(PacketGeneratorTest, Padding) {
   EXPECT_EQ(size_t(17), includer.size());
 }
 
+TEST(PacketGeneratorTest, Validate) {
+  simple::YetAnotherSimple container(100);
+  simple::Simple simple1(10);
+  container.add_simples(std::move(simple1));
+  container.set_test(-7);
+  EXPECT_TRUE(container.validate());
+
+  simple::YetAnotherSimpleView view(container);
+  EXPECT_EQ(container.size(), view.size());
+  EXPECT_EQ(1, view.get_s());
+  EXPECT_EQ(static_cast<size_t>(1), view.get_simples().size());
+  EXPECT_EQ(-7, view.get_test());
+
+  container.set_s(3);
+  EXPECT_FALSE(container.validate());
+  EXPECT_THROW(simple::YetAnotherSimpleView corrupted(container),
+               CorruptedDataException);
+
+  including::Including including(100);
+  EXPECT_TRUE(including.validate());
+  including.set_l(101);
+  EXPECT_FALSE(including.validate());
+}
+
+TEST(PacketGeneratorTest, EnumNames) {
+  EXPECT_STREQ("EXPR2", enum_name(simple::MathExpression::EXPR2));
+  EXPECT_EQ(nullptr, enum_name(static_cast<simple::MathExpression>(7)));
+  EXPECT_STREQ("ITEM3", enum_name(including::TestEnum::ITEM3));
+  EXPECT_EQ(nullptr, enum_name(static_cast<including::TestEnum>(3)));
+
+  simple::MathExpression expr;
+  EXPECT_TRUE(parse_enum("EXPR1", &expr));
+  EXPECT_EQ(simple::MathExpression::EXPR1, expr);
+
+  including::TestEnum item;
+  EXPECT_TRUE(parse_enum("ITEM1", &item));
+  EXPECT_EQ(including::TestEnum::ITEM1, item);
+  EXPECT_FALSE(parse_enum("ITEM", &item));
+}
+
 }  // namespace packet
 
@@ -85,7 +85,7 @@ class IoVector final {
     do_write_data<Data, is_big_endian>(data, offset);
   }
 
-  template <typename Data, bool is_big_endian = false>
+  template <typename Data, bool is_big_endian = false, bool safe = true>
   typename ::std::enable_if<std::is_base_of<Packet, Data>::value,
                             std::vector<Data>>::type  // NOLINT
       read_repeated_data(size_t offset = 0, size_t count = 0,
@@ -99,7 +99,7 @@ class IoVector final {
     return result;
   }
 
-  template <typename Data, bool is_big_endian = false>
+  template <typename Data, bool is_big_endian = false, bool safe = true>
   typename ::std::enable_if<std::is_integral<Data>::value,
                             std::vector<Data>>::type  // NOLINT
       read_repeated_data(size_t offset = 0, size_t count = 0,
@@ -108,7 +108,7 @@ class IoVector final {
     foreach_repeated_data<Data>(
         offset, count, size,
         [&result](const IoVector& vec, size_t element_size) {
-          result.push_back(vec.read_data<Data, is_big_endian>(0));
+          result.push_back(vec.read_data<Data, is_big_endian, safe>(0));
         });
     return result;
   }
@@ -240,7 +240,7 @@ class IoVector final {
 
     Data ret;
     for (size_t i = 0; i < no_of_elements; i++) {
-      ret[i] = read_data<typename Data::value_type, is_big_endian>(
+      ret[i] = read_data<typename Data::value_type, is_big_endian, false>(
           offset + i * element_size);
     }
     return ret;
@@ -15,6 +15,9 @@ type Conn struct {
 	ctor   Constructor
 	buf    []byte
 	offset int
+	w      *BatchWriter
+	stats  ReadReporter
+	kind   func(p SizedBuffer) string
 }
 
 // Constructor is a function that reads a packet from the buffer.
@@ -26,30 +29,55 @@ func NewConn(c net.Conn, f Constructor) Conn {
 		Conn: c,
 		ctor: f,
 		buf:  make([]byte, DefaultBufSize),
+		w:    NewBatchWriter(c),
 	}
 }
 
-// Write serializes packets into the connection.
+// SetFlushPolicy sets the policy that controls when written packets are sent.
+func (c *Conn) SetFlushPolicy(p FlushPolicy) {
+	c.w.Policy = p
+}
+
+// SetStats makes the connection report its events to s, or disables reporting
+// if s is nil. kind names the kinds of packets in the size histograms, and all
+// packets are of the same kind "" if it is nil.
+func (c *Conn) SetStats(s Stats, kind func(p SizedBuffer) string) {
+	c.stats = ReadReporter{Stats: s}
+	c.kind = kind
+}
+
+// Write serializes packets into the connection with a single vectored write.
+// The buffers of the packets are not copied, and must not be modified until
+// they are flushed. With the default flush policy, they are flushed before
+// Write returns.
 func (c *Conn) Write(pkts []interface{}) error {
+	bytes := 0
 	for _, p := range pkts {
 		pkt, ok := p.(SizedBuffer)
 		if !ok {
 			return fmt.Errorf("%#v is not a sized buffer", p)
 		}
-		s := pkt.Size()
-		b := pkt.Buffer()[:s]
-		n := 0
-		for s > 0 {
-			var err error
-			if n, err = c.Conn.Write(b); err != nil {
-				return fmt.Errorf("Error in write: %v", err)
-			}
-			s -= n
+		size := pkt.Size()
+		if err := c.w.Queue(pkt.Buffer()[:size]); err != nil {
+			return fmt.Errorf("Error in write: %v", err)
 		}
+		bytes += size
+	}
+
+	if err := c.w.EndBatch(); err != nil {
+		return fmt.Errorf("Error in write: %v", err)
+	}
+	if c.stats.Stats != nil {
+		c.stats.Write(bytes, len(pkts))
 	}
 	return nil
 }
 
+// Flush writes the packets queued by the flush policy.
+func (c *Conn) Flush() error {
+	return c.w.Flush()
+}
+
 // Read reads packets from the connection.
 func (c *Conn) Read(pkts []interface{}) (int, error) {
 	if len(c.buf) == c.offset {
@@ -61,6 +89,9 @@ func (c *Conn) Read(pkts []interface{}) (int, error) {
 		buf := make([]byte, newSize)
 		copy(buf, c.buf[:c.offset])
 		c.buf = buf
+		if c.stats.Stats != nil {
+			c.stats.Grow(newSize)
+		}
 	}
 
 	r, err := c.Conn.Read(c.buf[c.offset:])
@@ -68,6 +99,7 @@ func (c *Conn) Read(pkts []interface{}) (int, error) {
 		return 0, err
 	}
 
+	buffered := c.offset
 	r += c.offset
 
 	s := 0
@@ -88,6 +120,16 @@ func (c *Conn) Read(pkts []interface{}) (int, error) {
 		n++
 	}
 
+	if c.stats.Stats != nil {
+		c.stats.Report(n, r-buffered, buffered, s, func(i int) (string, int) {
+			pkt := pkts[i].(SizedBuffer)
+			if c.kind == nil {
+				return "", pkt.Size()
+			}
+			return c.kind(pkt), pkt.Size()
+		})
+	}
+
 	c.offset = r - s
 	if c.offset < 0 {
 		panic("Invalid value for offset")
@@ -0,0 +1,82 @@
+package packet
+
+import (
+	"io"
+	"os"
+)
+
+// FrameReader reads batches of packets as views over its buffers. The views
+// are valid until the lease of their batch is released.
+type FrameReader interface {
+	Read(pkts [][]byte) (int, Lease, error)
+}
+
+// SliceReader frames the packets of an in-memory buffer, such as a
+// memory-mapped file, without copying. Its leases are no-ops, and packets are
+// valid as long as the buffer is.
+type SliceReader struct {
+	buf     []byte
+	off     int
+	minSize int
+	size    SizeFunc
+}
+
+// NewSliceReader creates a reader of the back-to-back packets in b, which are
+// at least minSize bytes and whose sizes are given by size.
+func NewSliceReader(b []byte, minSize int, size SizeFunc) *SliceReader {
+	if minSize < 1 {
+		minSize = 1
+	}
+	return &SliceReader{buf: b, minSize: minSize, size: size}
+}
+
+// Offset returns the offset of the next packet in the buffer.
+func (r *SliceReader) Offset() int {
+	return r.off
+}
+
+// Read fills pkts with the next packets of the buffer. It returns io.EOF at
+// the end of the buffer, and io.ErrUnexpectedEOF if the buffer ends with a
+// truncated packet.
+func (r *SliceReader) Read(pkts [][]byte) (int, Lease, error) {
+	n := 0
+	for n < len(pkts) && len(r.buf)-r.off >= r.minSize {
+		b := r.buf[r.off:]
+		s := r.size(b)
+		if s < r.minSize {
+			return n, Lease{}, ErrInvalidSize
+		}
+		if s > len(b) {
+			break
+		}
+		pkts[n] = b[:s:s]
+		r.off += s
+		n++
+	}
+
+	if n > 0 || len(pkts) == 0 {
+		return n, Lease{}, nil
+	}
+	if r.off == len(r.buf) {
+		return 0, Lease{}, io.EOF
+	}
+	return 0, Lease{}, io.ErrUnexpectedEOF
+}
+
+// OpenFrameReader opens a file of back-to-back packets for reading. Regular
+// files are memory-mapped where supported, and other files, such as pipes,
+// are read in chunks of chunkSize bytes. The returned closer releases the file
+// and must only be called once the packets are not used.
+func OpenFrameReader(path string, minSize int, size SizeFunc,
+	chunkSize int) (FrameReader, io.Closer, error) {
+
+	if m, err := MapFile(path); err == nil {
+		return NewSliceReader(m.Data, minSize, size), m, nil
+	}
+
+	f, err := os.Open(path)
+	if err != nil {
+		return nil, nil, err
+	}
+	return NewRingReader(f, minSize, size, chunkSize), f, nil
+}
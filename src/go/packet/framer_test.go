@@ -0,0 +1,176 @@
+package packet
+
+import (
+	"io"
+	"io/ioutil"
+	"os"
+	"testing"
+)
+
+// readFrames reads all the frames of r, and returns them and the error that
+// stopped reading.
+func readFrames(r FrameReader, batch int) ([]string, error) {
+	var frames []string
+	pkts := make([][]byte, batch)
+	for {
+		n, l, err := r.Read(pkts)
+		for _, p := range pkts[:n] {
+			frames = append(frames, string(p))
+		}
+		l.Release()
+		if err != nil {
+			return frames, err
+		}
+	}
+}
+
+func TestSliceReader(t *testing.T) {
+	data := []byte{2, 'a', 3, 'b', 'c', 1, 5, 'd', 'e'}
+	r := NewSliceReader(data, 1, sizeOfFirstByte)
+	frames, err := readFrames(r, 2)
+	if err != io.ErrUnexpectedEOF {
+		t.Errorf("Truncated frame results in %v", err)
+	}
+	if len(frames) != 3 || frames[0] != "\x02a" || frames[1] != "\x03bc" ||
+		frames[2] != "\x01" {
+		t.Errorf("SliceReader returned %q", frames)
+	}
+	if r.Offset() != 6 {
+		t.Errorf("SliceReader stopped at %d instead of 6.", r.Offset())
+	}
+
+	frames, err = readFrames(NewSliceReader(data[:6], 1, sizeOfFirstByte), 8)
+	if err != io.EOF || len(frames) != 3 {
+		t.Errorf("SliceReader returned %q and %v", frames, err)
+	}
+
+	_, err = readFrames(NewSliceReader([]byte{0, 1}, 1, sizeOfFirstByte), 8)
+	if err != ErrInvalidSize {
+		t.Errorf("Invalid size results in %v", err)
+	}
+}
+
+// tempFrames writes the data into a temporary file and returns its path.
+func tempFrames(t testing.TB, data []byte) string {
+	f, err := ioutil.TempFile("", "frames")
+	if err != nil {
+		t.Fatal(err)
+	}
+	defer f.Close()
+	if _, err := f.Write(data); err != nil {
+		t.Fatal(err)
+	}
+	return f.Name()
+}
+
+func TestOpenFrameReader(t *testing.T) {
+	data := []byte{2, 'a', 3, 'b', 'c', 1}
+	path := tempFrames(t, data)
+	defer os.Remove(path)
+
+	r, c, err := OpenFrameReader(path, 1, sizeOfFirstByte, 4)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if _, ok := r.(*SliceReader); !ok {
+		t.Logf("%s is not memory-mapped.", path)
+	}
+	frames, err := readFrames(r, 2)
+	if err != io.EOF || len(frames) != 3 || frames[1] != "\x03bc" {
+		t.Errorf("OpenFrameReader returned %q and %v", frames, err)
+	}
+	if err := c.Close(); err != nil {
+		t.Error(err)
+	}
+
+	empty := tempFrames(t, nil)
+	defer os.Remove(empty)
+	r, c, err = OpenFrameReader(empty, 1, sizeOfFirstByte, 4)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if frames, err := readFrames(r, 2); err != io.EOF || len(frames) != 0 {
+		t.Errorf("Empty file results in %q and %v", frames, err)
+	}
+	c.Close()
+
+	if _, _, err := OpenFrameReader(path+".missing", 1, sizeOfFirstByte,
+		4); err == nil {
+		t.Error("Opening a missing file succeeded.")
+	}
+}
+
+func TestMapFileWrite(t *testing.T) {
+	data := []byte{2, 'a', 3, 'b', 'c'}
+	path := tempFrames(t, data)
+	defer os.Remove(path)
+
+	m, err := MapFile(path)
+	if err != nil {
+		t.Skip(err)
+	}
+	defer m.Close()
+
+	// Replayed packets can be modified in place, without changing the file.
+	pkts := make([][]byte, 2)
+	n, _, err := NewSliceReader(m.Data, 1, sizeOfFirstByte).Read(pkts)
+	if n != 2 || err != nil {
+		t.Fatalf("Read %d frames (%v).", n, err)
+	}
+	pkts[1][1] = 'x'
+	if m.Data[3] != 'x' {
+		t.Errorf("Frame is not modified in place: %q", m.Data)
+	}
+	if b, err := ioutil.ReadFile(path); err != nil || string(b) != string(data) {
+		t.Errorf("Modifying a frame changed the file to %q (%v).", b, err)
+	}
+}
+
+// benchReplay reads all the frames of a file of b.N frames.
+func benchReplay(b *testing.B, open func(path string) (FrameReader, io.Closer)) {
+	data := serverFrames(b.N, serverBenchFrameSize, 251)
+	path := tempFrames(b, data)
+	defer os.Remove(path)
+
+	b.ReportAllocs()
+	b.SetBytes(serverBenchFrameSize)
+	b.ResetTimer()
+	r, c := open(path)
+	defer c.Close()
+	pkts := make([][]byte, DefaultBatchSize)
+	for {
+		n, l, err := r.Read(pkts)
+		for _, p := range pkts[:n] {
+			if len(p) != serverBenchFrameSize {
+				b.Fatalf("Invalid frame of %d bytes.", len(p))
+			}
+		}
+		l.Release()
+		if err == io.EOF {
+			break
+		}
+		if err != nil {
+			b.Fatal(err)
+		}
+	}
+}
+
+func BenchmarkReplayMapped(b *testing.B) {
+	benchReplay(b, func(path string) (FrameReader, io.Closer) {
+		m, err := MapFile(path)
+		if err != nil {
+			b.Skip(err)
+		}
+		return NewSliceReader(m.Data, 1, sizeOfFirstByte), m
+	})
+}
+
+func BenchmarkReplayFile(b *testing.B) {
+	benchReplay(b, func(path string) (FrameReader, io.Closer) {
+		f, err := os.Open(path)
+		if err != nil {
+			b.Fatal(err)
+		}
+		return NewRingReader(f, 1, sizeOfFirstByte, 1<<20), f
+	})
+}
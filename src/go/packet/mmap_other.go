@@ -0,0 +1,23 @@
+//go:build !darwin && !dragonfly && !freebsd && !linux && !netbsd && !openbsd && !solaris
+// +build !darwin,!dragonfly,!freebsd,!linux,!netbsd,!openbsd,!solaris
+
+package packet
+
+import "errors"
+
+// MappedFile is a private memory mapping of a regular file. The data can be
+// modified in place, for example by the setters of replayed packets, but the
+// changes are copied on write and never reach the file.
+type MappedFile struct {
+	Data []byte // The contents of the file.
+}
+
+// MapFile is not supported on this platform, and always fails.
+func MapFile(path string) (*MappedFile, error) {
+	return nil, errors.New("Cannot map " + path + ": mmap is not supported")
+}
+
+// Close unmaps the file.
+func (m *MappedFile) Close() error {
+	return nil
+}
@@ -0,0 +1,57 @@
+//go:build darwin || dragonfly || freebsd || linux || netbsd || openbsd || solaris
+// +build darwin dragonfly freebsd linux netbsd openbsd solaris
+
+package packet
+
+import (
+	"errors"
+	"os"
+	"syscall"
+)
+
+// MappedFile is a private memory mapping of a regular file. The data can be
+// modified in place, for example by the setters of replayed packets, but the
+// changes are copied on write and never reach the file.
+type MappedFile struct {
+	Data []byte // The contents of the file.
+}
+
+// MapFile maps the regular file at path into memory.
+func MapFile(path string) (*MappedFile, error) {
+	f, err := os.Open(path)
+	if err != nil {
+		return nil, err
+	}
+	defer f.Close()
+
+	info, err := f.Stat()
+	if err != nil {
+		return nil, err
+	}
+	if !info.Mode().IsRegular() {
+		return nil, errors.New("Cannot map " + path + ": not a regular file")
+	}
+	if info.Size() == 0 {
+		return &MappedFile{}, nil
+	}
+	if int64(int(info.Size())) != info.Size() {
+		return nil, errors.New("Cannot map " + path + ": file is too large")
+	}
+
+	data, err := syscall.Mmap(int(f.Fd()), 0, int(info.Size()),
+		syscall.PROT_READ|syscall.PROT_WRITE, syscall.MAP_PRIVATE)
+	if err != nil {
+		return nil, err
+	}
+	return &MappedFile{Data: data}, nil
+}
+
+// Close unmaps the file. The data of the file must not be used afterwards.
+func (m *MappedFile) Close() error {
+	if m.Data == nil {
+		return nil
+	}
+	err := syscall.Munmap(m.Data)
+	m.Data = nil
+	return err
+}
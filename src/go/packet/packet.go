@@ -10,7 +10,39 @@ type SizedBuffer interface {
 
 // Packet is the parent structure of all packets.
 type Packet struct {
-	Buf []byte // The underlying buffer of the packet.
+	Buf     []byte      // The underlying buffer of the packet.
+	Offsets OffsetCache // The cached offsets of fields, nil if not cached.
+	owned   bool        // Whether Buf is acquired from a BufPool.
+}
+
+// OffsetCache memoizes the offsets of fields that follow variable-size fields.
+// It is only used by packets generated with offset caching, and is shared by
+// all copies of a packet view. Each slot holds the offset plus one, so that
+// zero means the offset is not computed yet.
+type OffsetCache []int
+
+// Get returns the cached offset in slot i, or -1 if it is not cached.
+func (c OffsetCache) Get(i int) int {
+	if i < len(c) {
+		return c[i] - 1
+	}
+	return -1
+}
+
+// Put caches the offset in slot i.
+func (c OffsetCache) Put(i, offset int) {
+	if i < len(c) {
+		c[i] = offset + 1
+	}
+}
+
+// Invalidate drops all cached offsets. Setters invalidate the cache of their
+// packet, but sub-packets modified through their own views do not, and the
+// cache of the parent must be invalidated explicitly.
+func (c OffsetCache) Invalidate() {
+	for i := range c {
+		c[i] = 0
+	}
 }
 
 // Size returns the size of this packet. This method is always overriden by the
@@ -40,15 +72,15 @@ func (p *Packet) OpenGap(offset, size, packetSize int) {
 		p.Buf = b
 	}
 
-	if len(p.Buf) < offset+size {
-		p.Buf = p.Buf[:offset+size]
+	if len(p.Buf) < packetSize+size {
+		p.Buf = p.Buf[:packetSize+size]
 	}
 
 	if packetSize == offset {
 		return
 	}
 
-	copy(p.Buf[offset:], p.Buf[offset+size:])
+	copy(p.Buf[offset+size:], p.Buf[offset:packetSize])
 }
 
 // PaddedSize returns the size padded to the given multiple.
@@ -1,8 +1,13 @@
 package packet
 
 import (
+	"bytes"
+	"fmt"
+	"io"
+	"os"
 	"testing"
 
+	"../../../out/Debug/gen/packet/test/dispatch"
 	"../../../out/Debug/gen/packet/test/including"
 	"../../../out/Debug/gen/packet/test/simple"
 )
@@ -24,6 +29,219 @@ func TestSimplePacket(t *testing.T) {
 	}
 }
 
+func TestAppendTo(t *testing.T) {
+	buf := []byte{3, 12, 9, 1, 3, 1, 1, 3, 1, 1, 3, 1, 0xFF}
+	pkt := simple.NewYetYetAnotherSimpleWithBuf(buf)
+
+	dst := pkt.AppendTo([]byte{7})
+	if !bytes.Equal(dst, append([]byte{7}, buf[:pkt.Size()]...)) {
+		t.Errorf("AppendTo results in %v", dst)
+	}
+
+	if n := pkt.CopyTo(make([]byte, pkt.Size()-1)); n != 0 {
+		t.Errorf("CopyTo copied %d bytes into a short buffer.", n)
+	}
+	if n := pkt.CopyTo(make([]byte, 100)); n != pkt.Size() {
+		t.Errorf("CopyTo copied %d bytes instead of %d.", n, pkt.Size())
+	}
+
+	arena := make([]byte, 0, 64)
+	c, arena := pkt.CloneTo(arena)
+	c2, arena := pkt.CloneTo(arena)
+	if len(arena) != 2*pkt.Size() || len(c.A()) != 3 || len(c2.A()) != 3 {
+		t.Errorf("CloneTo results in %v", arena)
+	}
+
+	c.AddA(simple.NewAnotherSimple())
+	if len(c2.A()) != 3 {
+		t.Errorf("Adding to a clone overwrote the next clone: %v", arena)
+	}
+
+	clone, err := pkt.Clone()
+	if err != nil || !bytes.Equal(clone.Buf, buf[:pkt.Size()]) {
+		t.Errorf("Clone results in %v (%v)", clone.Buf, err)
+	}
+}
+
+func TestAcquire(t *testing.T) {
+	pkt := simple.AcquireYetAnotherSimple()
+	pkt.AddSimples(simple.NewSimple())
+	pkt.SetTest(7)
+	buf := pkt.Buf
+
+	pkt.Reset()
+	if pkt.Size() != 4 || pkt.S() != 0 || pkt.Test() != 0 || pkt.C() != 3 {
+		t.Errorf("Reset results in %v", pkt.Buf)
+	}
+	if &pkt.Buf[0] != &buf[0] {
+		t.Errorf("Reset reallocated the buffer.")
+	}
+
+	pkt.AddSimples(simple.NewSimple())
+	if !simple.ReleaseYetAnotherSimple(pkt) {
+		t.Errorf("Acquired packet is not released.")
+	}
+	pkt = simple.AcquireYetAnotherSimple()
+	if pkt.Size() != 4 || pkt.S() != 0 || pkt.C() != 3 {
+		t.Errorf("Acquired packet is not initialized: %v", pkt.Buf)
+	}
+
+	// Views of the fields and packets that are not acquired are not released.
+	pkt.AddSimples(simple.NewSimple())
+	if simple.ReleaseSimple(pkt.Simples()[0]) {
+		t.Errorf("View of a field is released.")
+	}
+	if simple.ReleaseYetAnotherSimple(simple.NewYetAnotherSimple()) {
+		t.Errorf("New packet is released.")
+	}
+	if !simple.ReleaseYetAnotherSimple(pkt) {
+		t.Errorf("Acquired packet is not released.")
+	}
+}
+
+func TestString(t *testing.T) {
+	pkt := simple.NewYetAnotherSimple()
+	pkt.AddSimples(simple.NewSimple())
+	pkt.AddSimples(simple.NewSimple())
+	pkt.SetTest(-7)
+
+	str := "YetAnotherSimple{c: 3, l: 6, s: 2, simples: [Simple{x: 1}, " +
+		"Simple{x: 1}], test: -7}"
+	if pkt.String() != str {
+		t.Errorf("String returned %s instead of %s", pkt.String(), str)
+	}
+
+	js := `{"c":3,"l":6,"s":2,"simples":[{"x":1},{"x":1}],"test":-7}`
+	if b := pkt.AppendJSON([]byte("x")); string(b) != "x"+js {
+		t.Errorf("AppendJSON returned %s instead of %s", b[1:], js)
+	}
+
+	m := simple.NewMathExpressionPacket()
+	if m.String() != "MathExpressionPacket{c: EXPR1, l: 2}" ||
+		string(m.AppendJSON(nil)) != `{"c":"EXPR1","l":2}` {
+		t.Errorf("Enum is not symbolic in %s and %s", m, m.AppendJSON(nil))
+	}
+	m.SetC(200)
+	if m.String() != "MathExpressionPacket{c: 200, l: 2}" ||
+		string(m.AppendJSON(nil)) != `{"c":200,"l":2}` {
+		t.Errorf("Value out of the enum is encoded in %s and %s", m,
+			m.AppendJSON(nil))
+	}
+
+	inc := including.NewAnotherIncluding()
+	if inc.String() != "AnotherIncluding{c: ITEM2, l: 4, arr: [0, 0]}" {
+		t.Errorf("String returned %s", inc)
+	}
+
+	trunc := simple.NewYetAnotherSimpleWithBuf(pkt.Buf[:5])
+	if trunc.String() != "YetAnotherSimple{<truncated>}" ||
+		string(trunc.AppendJSON(nil)) != "null" {
+		t.Errorf("Truncated packet is encoded as %s", trunc)
+	}
+}
+
+func TestValidate(t *testing.T) {
+	pkt := simple.NewYetAnotherSimple()
+	pkt.AddSimples(simple.NewSimple())
+	pkt.AddSimples(simple.NewSimple())
+	pkt.SetTest(-7)
+
+	v, err := pkt.View()
+	if err != nil {
+		t.Fatalf("Valid packet results in %v", err)
+	}
+	if v.Size() != pkt.Size() || v.S() != 2 || len(v.Simples()) != 2 ||
+		v.Test() != -7 {
+		t.Errorf("View returned %d, %d, %v and %d", v.Size(), v.S(), v.Simples(),
+			v.Test())
+	}
+
+	if err := simple.NewYetAnotherSimpleWithBuf(pkt.Buf[:5]).Validate(); err !=
+		io.ErrUnexpectedEOF {
+		t.Errorf("Truncated packet results in %v", err)
+	}
+
+	pkt.SetS(3)
+	if err := pkt.Validate(); err == nil {
+		t.Error("Packet with an invalid count is valid.")
+	}
+
+	inc := including.NewIncluding()
+	inc.AddS(simple.NewSimple())
+	if v, err := inc.View(); err != nil || len(v.S()) != 1 {
+		t.Errorf("View of Including returned %v and %v", v.S(), err)
+	}
+	inc.SetL(inc.L() + 1)
+	if err := inc.Validate(); err != io.ErrUnexpectedEOF {
+		t.Errorf("Packet with an invalid size results in %v", err)
+	}
+}
+
+func TestEnum(t *testing.T) {
+	if simple.EXPR2.Name() != "EXPR2" || simple.MathExpression(7).Name() != "" {
+		t.Errorf("Dense enum names are %q and %q", simple.EXPR2.Name(),
+			simple.MathExpression(7).Name())
+	}
+	if including.ITEM3.Name() != "ITEM3" || including.TestEnum(3).Name() != "" ||
+		including.TestEnum(3).String() != "3" {
+		t.Errorf("Sparse enum names are %q and %q", including.ITEM3.Name(),
+			including.TestEnum(3).Name())
+	}
+
+	if e, ok := simple.ParseMathExpression("EXPR2"); !ok || e != simple.EXPR2 {
+		t.Errorf("EXPR2 is parsed as %v", e)
+	}
+	if e, ok := including.ParseTestEnum("ITEM1"); !ok || e != including.ITEM1 {
+		t.Errorf("ITEM1 is parsed as %v", e)
+	}
+	if _, ok := including.ParseTestEnum("ITEM"); ok {
+		t.Error("Parsed an invalid item.")
+	}
+}
+
+func TestReader(t *testing.T) {
+	r := simple.NewSimpleReader(bytes.NewReader([]byte{1, 2, 0, 3, 0, 0}))
+	pkts := make([]simple.Simple, 2)
+	var sizes []int
+	for {
+		n, l, err := r.ReadSimples(pkts)
+		if err != nil {
+			break
+		}
+		for _, p := range pkts[:n] {
+			sizes = append(sizes, p.Size())
+		}
+		l.Release()
+	}
+
+	if len(sizes) != 3 || sizes[0] != 1 || sizes[1] != 2 || sizes[2] != 3 {
+		t.Errorf("Reader returned packets of sizes %v instead of [1 2 3].",
+			sizes)
+	}
+}
+
+func TestOpenReader(t *testing.T) {
+	path := tempFrames(t, []byte{1, 2, 0, 3, 0, 0})
+	defer os.Remove(path)
+
+	r, err := simple.OpenSimpleReader(path)
+	if err != nil {
+		t.Fatal(err)
+	}
+	defer r.Close()
+
+	pkts := make([]simple.Simple, 8)
+	n, l, err := r.ReadSimples(pkts)
+	if err != nil || n != 3 || pkts[2].Size() != 3 {
+		t.Errorf("Reader returned %d packets (%v): %v", n, err, pkts[:n])
+	}
+	l.Release()
+
+	if _, _, err := r.ReadSimples(pkts); err != io.EOF {
+		t.Errorf("Reader returned %v instead of EOF.", err)
+	}
+}
+
 func TestPolymorphism(t *testing.T) {
 	buf := []byte{2, 4, 1, 1, 1, 1}
 	par := simple.NewSimpleParentWithBuf(buf)
@@ -48,6 +266,76 @@ func TestPolymorphism(t *testing.T) {
 	}
 }
 
+func TestDispatch(t *testing.T) {
+	par := simple.NewSimpleParentWithBuf([]byte{3, 4, 0, 0})
+	if k := simple.DispatchSimpleParent(par); k != simple.KindYetAnotherSimple {
+		t.Errorf("Simple parent is dispatched to %d instead of %d.", k,
+			simple.KindYetAnotherSimple)
+	}
+
+	if k := including.DispatchSimpleParent(par); k != including.KindUnknown {
+		t.Errorf("Simple parent is dispatched to including packet %d.", k)
+	}
+
+	par.Buf[0] = 2
+	if k := including.DispatchSimpleParent(par); k != including.KindIncluding {
+		t.Errorf("Simple parent is dispatched to %d instead of %d.", k,
+			including.KindIncluding)
+	}
+
+	par.Buf[0] = 42
+	if k := simple.DispatchSimpleParent(par); k != simple.KindSimpleParent {
+		t.Errorf("Unknown subtype is dispatched to %d.", k)
+	}
+
+	if n := simple.KindYetAnotherSimple.String(); n != "YetAnotherSimple" {
+		t.Errorf("Kind is named %q instead of YetAnotherSimple.", n)
+	}
+	if n := simple.Kind(-1).String(); n != "Kind(-1)" {
+		t.Errorf("Invalid kind is named %q.", n)
+	}
+}
+
+func TestDispatchManySubtypes(t *testing.T) {
+	for i := 0; i < 56; i++ {
+		msg := dispatch.NewMessage()
+		msg.SetType(uint8(i))
+		k := dispatch.DispatchMessage(msg)
+		if n := fmt.Sprintf("Message%02d", i); k.String() != n {
+			t.Errorf("Message of type %d is dispatched to %v instead of %s.", i,
+				k, n)
+		}
+	}
+
+	msg := dispatch.NewMessage()
+	msg.SetType(56)
+	if k := dispatch.DispatchMessage(msg); k != dispatch.KindMessage {
+		t.Errorf("Unknown message type is dispatched to %v.", k)
+	}
+}
+
+func TestConnStatsKinds(t *testing.T) {
+	nc := &chunkConn{chunks: [][]byte{{3, 4, 0, 0, 42, 2}}}
+	c := simple.NewSimpleParentConn(nc)
+	s := NewExpvarStats()
+	c.SetStats(s)
+
+	pkts := make([]simple.SimpleParent, 4)
+	n, err := c.ReadSimpleParents(pkts)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if n != 2 {
+		t.Errorf("Read %d packets instead of 2.", n)
+	}
+	if s.Sizes("YetAnotherSimple").Sum() != 4 {
+		t.Errorf("Sizes of YetAnotherSimple are %v.", s.Sizes("YetAnotherSimple"))
+	}
+	if s.Sizes("SimpleParent").Sum() != 2 {
+		t.Errorf("Sizes of SimpleParent are %v.", s.Sizes("SimpleParent"))
+	}
+}
+
 func TestReadConstSizeArray(t *testing.T) {
 	buf := []byte{2, 4, 1, 1, 1, 1}
 	inc := including.NewAnotherIncludingWithBuf(buf)
@@ -85,6 +373,37 @@ func TestReadCountedArray(t *testing.T) {
 	}
 }
 
+func TestIterCountedArray(t *testing.T) {
+	buf := []byte{2, 7, 2, 1, 2, 3, 4}
+	pkt := simple.NewYetAnotherSimpleWithBuf(buf)
+	if pkt.SimplesCount() != 2 {
+		t.Errorf("SimplesCount is %d instead of 2.", pkt.SimplesCount())
+	}
+
+	var xs []uint8
+	it := pkt.SimplesIter()
+	for s, ok := it.Next(); ok; s, ok = it.Next() {
+		xs = append(xs, s.X())
+	}
+	if len(xs) != 2 || xs[0] != 1 || xs[1] != 2 {
+		t.Errorf("Iterator returned invalid elements: %v", xs)
+	}
+
+	n := 0
+	pkt.ForEachSimples(func(s simple.Simple) bool {
+		n++
+		return false
+	})
+	if n != 1 {
+		t.Errorf("ForEachSimples did not stop after %d elements.", n)
+	}
+
+	if pkt.SimplesSize() != 3 || pkt.Test() != 4 {
+		t.Errorf("Invalid size (%d) or field after the array (%d).",
+			pkt.SimplesSize(), pkt.Test())
+	}
+}
+
 func TestWriteCountedArray(t *testing.T) {
 	pkt := simple.NewYetAnotherSimple()
 	if pkt.Size() != 4 {
@@ -104,6 +423,48 @@ func TestWriteCountedArray(t *testing.T) {
 	if pkt.Size() != 6 {
 		t.Errorf("Packet size is not updated after we add two elements.")
 	}
+
+	pkt.SetTest(7)
+	pkt.AddSimples(simple.NewSimple())
+	if pkt.Test() != 7 || len(pkt.Buf) < pkt.Size() {
+		t.Errorf("Adding an element overwrote the next field: %v", pkt.Buf)
+	}
+
+	bulk := simple.NewYetAnotherSimple()
+	bulk.SetTest(7)
+	bulk.AddSimpless([]simple.Simple{simple.NewSimple(), simple.NewSimple(),
+		simple.NewSimple()})
+	if !bytes.Equal(bulk.Buf[:bulk.Size()], pkt.Buf[:pkt.Size()]) {
+		t.Errorf("Bulk add results in %v instead of %v", bulk.Buf, pkt.Buf)
+	}
+}
+
+func TestBuilder(t *testing.T) {
+	pkt := simple.NewYetAnotherSimple()
+	pkt.AddSimples(simple.NewSimple())
+	pkt.AddSimples(simple.NewSimple())
+	pkt.SetTest(7)
+
+	b := simple.YetAnotherSimpleBuilder{
+		Simples: []simple.Simple{simple.NewSimple(), simple.NewSimple()},
+		Test:    7,
+	}
+	if b.Size() != pkt.Size() {
+		t.Errorf("Builder computes a size of %d instead of %d.", b.Size(),
+			pkt.Size())
+	}
+
+	built := b.Build()
+	if len(built.Buf) != pkt.Size() ||
+		!bytes.Equal(built.Buf, pkt.Buf[:pkt.Size()]) {
+		t.Errorf("Builder results in %v instead of %v", built.Buf, pkt.Buf)
+	}
+
+	buf := bytes.Repeat([]byte{0xFF}, 16)
+	built = b.BuildWithBuf(buf)
+	if !bytes.Equal(built.Buf, pkt.Buf[:pkt.Size()]) {
+		t.Errorf("Builder results in %v instead of %v", built.Buf, pkt.Buf)
+	}
 }
 
 func TestReadSizedArray(t *testing.T) {
@@ -203,3 +564,27 @@ func TestPadded(t *testing.T) {
 			pkt.Size())
 	}
 }
+
+func TestOffsetCache(t *testing.T) {
+	var none OffsetCache
+	none.Put(0, 1)
+	if none.Get(0) != -1 {
+		t.Error("A nil offset cache should not cache offsets.")
+	}
+
+	c := make(OffsetCache, 2)
+	if c.Get(1) != -1 {
+		t.Errorf("Offset is cached as %d before being computed.", c.Get(1))
+	}
+
+	c.Put(1, 0)
+	c.Put(2, 5)
+	if c.Get(1) != 0 || c.Get(2) != -1 {
+		t.Errorf("Invalid cached offsets: %d %d", c.Get(1), c.Get(2))
+	}
+
+	c.Invalidate()
+	if c.Get(1) != -1 {
+		t.Error("Offset is cached after invalidation.")
+	}
+}
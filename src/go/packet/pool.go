@@ -0,0 +1,152 @@
+package packet
+
+import (
+	"sync"
+	"sync/atomic"
+)
+
+const (
+	// MinPooledSize and MaxPooledSize bound the capacity of pooled buffers.
+	// Buffers are pooled in power of two size classes, and larger buffers are
+	// neither pooled nor recycled.
+	MinPooledSize = 1 << minBufClass
+	MaxPooledSize = 1 << maxBufClass
+
+	minBufClass = 4
+	maxBufClass = 16
+	numBufClass = maxBufClass - minBufClass + 1
+)
+
+// DefaultBufPool is the pool used by the Acquire and Release functions of the
+// generated packets.
+var DefaultBufPool = &BufPool{}
+
+// bufHeaders recycles the slice headers stored in the pools of buffers, so
+// that releasing a buffer does not allocate.
+var bufHeaders = sync.Pool{
+	New: func() interface{} {
+		return new([]byte)
+	},
+}
+
+// PoolStats are the counters of a size class of a BufPool.
+type PoolStats struct {
+	Size int    // The capacity of the buffers in this class.
+	Gets uint64 // The number of buffers acquired.
+	Hits uint64 // The number of buffers acquired that were recycled.
+	Puts uint64 // The number of buffers released.
+}
+
+// HitRate returns the ratio of the acquired buffers that were recycled.
+func (s PoolStats) HitRate() float64 {
+	if s.Gets == 0 {
+		return 0
+	}
+	return float64(s.Hits) / float64(s.Gets)
+}
+
+// bufClass is a size class of a BufPool. The counters are first to keep them
+// aligned for atomic operations.
+type bufClass struct {
+	gets uint64
+	hits uint64
+	puts uint64
+	pool sync.Pool
+}
+
+// BufPool is a pool of buffers in power of two size classes. The zero value is
+// an empty pool ready to use, and it is safe for concurrent use.
+type BufPool struct {
+	classes [numBufClass]bufClass
+}
+
+// getClass returns the smallest class that fits size bytes, or -1 if size is
+// too large to pool.
+func getClass(size int) int {
+	c := 0
+	for s := MinPooledSize; s < size; s <<= 1 {
+		c++
+	}
+	if c >= numBufClass {
+		return -1
+	}
+	return c
+}
+
+// putClass returns the class of a buffer of capacity c, or -1 if c is not the
+// size of a class. Get only returns such buffers for pooled sizes.
+func putClass(c int) int {
+	for class := 0; class < numBufClass; class++ {
+		if c == MinPooledSize<<uint(class) {
+			return class
+		}
+	}
+	return -1
+}
+
+// Get returns a buffer of size bytes. The buffer is not zeroed.
+func (p *BufPool) Get(size int) []byte {
+	c := getClass(size)
+	if c < 0 {
+		return make([]byte, size)
+	}
+
+	class := &p.classes[c]
+	atomic.AddUint64(&class.gets, 1)
+	if h, ok := class.pool.Get().(*[]byte); ok {
+		b := *h
+		*h = nil
+		bufHeaders.Put(h)
+		atomic.AddUint64(&class.hits, 1)
+		return b[:size]
+	}
+	return make([]byte, size, MinPooledSize<<uint(c))
+}
+
+// Put returns a buffer acquired by Get to the pool. The buffer must not be used
+// afterwards. Buffers whose capacity is not the size of a class are dropped.
+func (p *BufPool) Put(b []byte) {
+	c := putClass(cap(b))
+	if c < 0 {
+		return
+	}
+
+	class := &p.classes[c]
+	atomic.AddUint64(&class.puts, 1)
+	h := bufHeaders.Get().(*[]byte)
+	*h = b[:0]
+	class.pool.Put(h)
+}
+
+// Acquire returns a packet of size bytes in a buffer of the pool. The packet
+// owns its buffer, and should be released with Release once it is not used.
+func (p *BufPool) Acquire(size int) Packet {
+	return Packet{Buf: p.Get(size), owned: true}
+}
+
+// Release returns the buffer of a packet returned by Acquire to the pool, and
+// reports whether it did. Packets that do not own their buffer, such as views
+// of the fields of other packets, are refused. Neither the packet nor any view
+// over its buffer may be used after it is released.
+func (p *BufPool) Release(pkt Packet) bool {
+	if !pkt.owned || putClass(cap(pkt.Buf)) < 0 {
+		return false
+	}
+	p.Put(pkt.Buf)
+	return true
+}
+
+// Stats returns the counters of the size classes of the pool.
+func (p *BufPool) Stats() []PoolStats {
+	stats := make([]PoolStats, numBufClass)
+	for i := range p.classes {
+		class := &p.classes[i]
+		stats[i] = PoolStats{
+			Size: MinPooledSize << uint(i),
+			Gets: atomic.LoadUint64(&class.gets),
+			Hits: atomic.LoadUint64(&class.hits),
+			Puts: atomic.LoadUint64(&class.puts),
+		}
+	}
+	return stats
+}
@@ -0,0 +1,94 @@
+package packet
+
+import "testing"
+
+func TestBufPoolClasses(t *testing.T) {
+	p := &BufPool{}
+	for _, size := range []int{0, 1, 16, 17, 1000, MaxPooledSize} {
+		b := p.Get(size)
+		if len(b) != size || cap(b) < size {
+			t.Errorf("Get(%d) returned a buffer of len %d and cap %d.", size,
+				len(b), cap(b))
+		}
+		if cap(b) != MinPooledSize && cap(b) >= 2*size {
+			t.Errorf("Get(%d) returned a buffer of cap %d.", size, cap(b))
+		}
+	}
+
+	if b := p.Get(MaxPooledSize + 1); len(b) != MaxPooledSize+1 {
+		t.Errorf("Get returned a buffer of len %d for a large size.", len(b))
+	}
+	p.Put(make([]byte, MaxPooledSize+1))
+	p.Put(make([]byte, MinPooledSize-1))
+	for _, s := range p.Stats() {
+		if s.Puts != 0 {
+			t.Errorf("Buffers of invalid sizes are pooled in class %d.", s.Size)
+		}
+	}
+}
+
+func TestBufPoolReuse(t *testing.T) {
+	p := &BufPool{}
+	for i := 0; i < 100; i++ {
+		b := p.Get(100)
+		b[0] = 1
+		p.Put(b)
+	}
+
+	// A buffer of 100 bytes is allocated in the class of 128 bytes.
+	s := p.Stats()[3]
+	if s.Size != 128 || s.Gets != 100 || s.Puts != 100 {
+		t.Errorf("Invalid pool stats: %+v", s)
+	}
+	if s.Hits == 0 || s.Hits >= s.Gets || s.HitRate() <= 0 {
+		t.Errorf("Buffers are not reused: %+v", s)
+	}
+
+	// Only buffers with the capacity of a class are pooled.
+	p.Put(make([]byte, 0, 200))
+	p.Put(make([]byte, 10, 128)[4:])
+	if s := p.Stats()[3]; s.Puts != 100 {
+		t.Errorf("Buffer that is not from Get is pooled: %+v", s)
+	}
+	p.Put(make([]byte, 0, 128))
+	if s := p.Stats()[3]; s.Puts != 101 {
+		t.Errorf("Buffer is released into the wrong class: %+v", s)
+	}
+}
+
+func TestBufPoolRelease(t *testing.T) {
+	p := &BufPool{}
+	pkt := p.Acquire(100)
+	if len(pkt.Buf) != 100 {
+		t.Errorf("Acquired packet has %d bytes.", len(pkt.Buf))
+	}
+
+	view := Packet{Buf: pkt.Buf[:64]}
+	if p.Release(view) || p.Release(Packet{Buf: make([]byte, 128)}) {
+		t.Errorf("Packets that do not own their buffer are released.")
+	}
+	if !p.Release(pkt) {
+		t.Errorf("Acquired packet is not released.")
+	}
+	if s := p.Stats()[3]; s.Puts != 1 {
+		t.Errorf("Invalid pool stats: %+v", s)
+	}
+}
+
+func BenchmarkBufPool(b *testing.B) {
+	p := &BufPool{}
+	b.ReportAllocs()
+	for i := 0; i < b.N; i++ {
+		p.Put(p.Get(100))
+	}
+}
+
+func BenchmarkBufPoolParallel(b *testing.B) {
+	p := &BufPool{}
+	b.ReportAllocs()
+	b.RunParallel(func(pb *testing.PB) {
+		for pb.Next() {
+			p.Put(p.Get(100))
+		}
+	})
+}
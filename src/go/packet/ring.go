@@ -0,0 +1,186 @@
+package packet
+
+import (
+	"errors"
+	"io"
+	"sync"
+	"sync/atomic"
+)
+
+const (
+	DefaultChunkSize = 1 << 16
+)
+
+// ErrInvalidSize is returned when a packet has a size smaller than its
+// minimum size.
+var ErrInvalidSize = errors.New("Invalid packet size")
+
+// SizeFunc returns the size of the packet at the beginning of b, or 0 if b is
+// too short to tell.
+type SizeFunc func(b []byte) int
+
+// chunk is a large buffer that holds many packets. It is returned to its pool
+// once the reader moves to the next chunk and all leases are released.
+type chunk struct {
+	buf  []byte
+	refs int32
+	pool *sync.Pool
+}
+
+func (c *chunk) release() {
+	if atomic.AddInt32(&c.refs, -1) == 0 && c.pool != nil {
+		c.pool.Put(c)
+	}
+}
+
+// Lease keeps the buffer of a batch of packets alive. Packets must not be used
+// after their lease is released.
+type Lease struct {
+	c *chunk
+}
+
+// Release returns the buffer of the packets to the reader for reuse. It is
+// safe to release leases from other goroutines.
+func (l Lease) Release() {
+	if l.c != nil {
+		l.c.release()
+	}
+}
+
+// Retain adds a reference to the buffer of the lease, and returns a lease that
+// must be released separately. It is used to hand parts of a batch to other
+// goroutines.
+func (l Lease) Retain() Lease {
+	if l.c != nil {
+		atomic.AddInt32(&l.c.refs, 1)
+	}
+	return l
+}
+
+// RingReader reads packets into a ring of large buffers recycled through a
+// pool. Packets are zero-copy views over the buffers, and the buffer of a
+// batch is reused once the batch's lease is released.
+type RingReader struct {
+	r       io.Reader
+	minSize int
+	size    SizeFunc
+	pool    *sync.Pool
+	cur     *chunk
+	start   int
+	end     int
+}
+
+// NewRingReader creates a reader of packets of at least minSize bytes, whose
+// sizes are given by size. Buffers hold chunkSize bytes, and larger packets
+// use dedicated buffers.
+func NewRingReader(r io.Reader, minSize int, size SizeFunc,
+	chunkSize int) *RingReader {
+
+	if minSize < 1 {
+		minSize = 1
+	}
+	if chunkSize < minSize {
+		chunkSize = DefaultChunkSize
+	}
+
+	pool := &sync.Pool{}
+	pool.New = func() interface{} {
+		return &chunk{buf: make([]byte, chunkSize), pool: pool}
+	}
+	return &RingReader{
+		r:       r,
+		minSize: minSize,
+		size:    size,
+		pool:    pool,
+	}
+}
+
+// Buffered returns the number of buffered bytes that are not returned yet.
+func (r *RingReader) Buffered() int {
+	return r.end - r.start
+}
+
+// frames fills pkts with the complete packets in the buffer.
+func (r *RingReader) frames(pkts [][]byte) (int, error) {
+	n := 0
+	for n < len(pkts) && r.end-r.start >= r.minSize {
+		b := r.cur.buf[r.start:r.end]
+		s := r.size(b)
+		if s < r.minSize {
+			return n, ErrInvalidSize
+		}
+		if s > len(b) {
+			break
+		}
+		pkts[n] = b[:s:s]
+		r.start += s
+		n++
+	}
+	return n, nil
+}
+
+// need returns the number of bytes needed to complete the next packet.
+func (r *RingReader) need() int {
+	if r.end-r.start < r.minSize {
+		return r.minSize
+	}
+	return r.size(r.cur.buf[r.start:r.end])
+}
+
+// rotate moves the incomplete packet at the end of the current chunk into a
+// new chunk that can hold at least n bytes.
+func (r *RingReader) rotate(n int) {
+	c := r.pool.Get().(*chunk)
+	if len(c.buf) < n {
+		r.pool.Put(c)
+		c = &chunk{buf: make([]byte, n)}
+	}
+	c.refs = 1
+
+	if r.cur != nil {
+		copy(c.buf, r.cur.buf[r.start:r.end])
+		r.cur.release()
+	}
+	r.end -= r.start
+	r.start = 0
+	r.cur = c
+}
+
+// Read fills pkts with the packets that are already buffered, and only reads
+// from the underlying reader if there are none. The packets are views over
+// the buffer of the lease, which must be released once they are not used.
+// Read returns immediately if pkts is empty.
+func (r *RingReader) Read(pkts [][]byte) (int, Lease, error) {
+	if len(pkts) == 0 {
+		return 0, Lease{}, nil
+	}
+
+	for {
+		if r.cur != nil {
+			n, err := r.frames(pkts)
+			if n > 0 || err != nil {
+				atomic.AddInt32(&r.cur.refs, 1)
+				return n, Lease{r.cur}, err
+			}
+		}
+
+		need := r.need()
+		if r.cur == nil || len(r.cur.buf)-r.start < need ||
+			(len(r.cur.buf) == r.end) {
+			size := need
+			if r.cur != nil && r.end-r.start > size {
+				size = r.end - r.start
+			}
+			r.rotate(size)
+		}
+
+		m, err := r.r.Read(r.cur.buf[r.end:])
+		r.end += m
+		if err != nil && m == 0 {
+			if err == io.EOF && r.end != r.start {
+				err = io.ErrUnexpectedEOF
+			}
+			return 0, Lease{}, err
+		}
+	}
+}
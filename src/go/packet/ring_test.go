@@ -0,0 +1,141 @@
+package packet
+
+import (
+	"bytes"
+	"io"
+	"net"
+	"testing"
+)
+
+// sizeOfFirstByte is the size function of packets whose first byte is their
+// size.
+func sizeOfFirstByte(b []byte) int {
+	return int(b[0])
+}
+
+func TestRingReader(t *testing.T) {
+	data := []byte{2, 'a', 3, 'b', 'c', 1, 5, 'd', 'e', 'f', 'g'}
+	r := NewRingReader(bytes.NewReader(data), 1, sizeOfFirstByte, 4)
+	var got []string
+	var leases []Lease
+	pkts := make([][]byte, 8)
+	for {
+		n, l, err := r.Read(pkts)
+		if err == io.EOF {
+			break
+		}
+		if err != nil {
+			t.Fatal(err)
+		}
+		for _, p := range pkts[:n] {
+			got = append(got, string(p))
+		}
+		leases = append(leases, l)
+	}
+
+	want := []string{"\x02a", "\x03bc", "\x01", "\x05defg"}
+	if len(got) != len(want) {
+		t.Fatalf("Read %q instead of %q.", got, want)
+	}
+	for i := range want {
+		if got[i] != want[i] {
+			t.Errorf("Packet %d is %q instead of %q.", i, got[i], want[i])
+		}
+	}
+
+	for _, l := range leases {
+		l.Release()
+	}
+}
+
+func TestRingReaderErrors(t *testing.T) {
+	pkts := make([][]byte, 1)
+	r := NewRingReader(bytes.NewReader([]byte{3, 'a'}), 1, sizeOfFirstByte, 4)
+	if _, _, err := r.Read(pkts); err != io.ErrUnexpectedEOF {
+		t.Errorf("Truncated packet returned %v.", err)
+	}
+
+	r = NewRingReader(bytes.NewReader([]byte{0, 'a'}), 1, sizeOfFirstByte, 4)
+	if _, _, err := r.Read(pkts); err != ErrInvalidSize {
+		t.Errorf("Invalid packet returned %v.", err)
+	}
+}
+
+func TestRingReaderEmpty(t *testing.T) {
+	r := NewRingReader(bytes.NewReader([]byte{2, 'a'}), 1, sizeOfFirstByte, 4)
+	if n, _, err := r.Read(nil); n != 0 || err != nil {
+		t.Errorf("Read into no packets returned %d, %v.", n, err)
+	}
+
+	pkts := make([][]byte, 1)
+	n, l, err := r.Read(pkts)
+	if n != 1 || err != nil || string(pkts[0]) != "\x02a" {
+		t.Errorf("Read returned %d, %v, %q.", n, err, pkts[0])
+	}
+	l.Release()
+}
+
+// loopReader returns the same data forever.
+type loopReader struct {
+	net.Conn
+	data []byte
+	off  int
+}
+
+func (r *loopReader) Read(b []byte) (int, error) {
+	n := copy(b, r.data[r.off:])
+	r.off = (r.off + n) % len(r.data)
+	return n, nil
+}
+
+func benchData() []byte {
+	data := make([]byte, 64*64)
+	for i := 0; i < len(data); i += 64 {
+		data[i] = 64
+	}
+	return data
+}
+
+// firstByteCtor constructs packets whose first byte is their size.
+func firstByteCtor(b []byte) (SizedBuffer, error) {
+	if len(b) == 0 || len(b) < int(b[0]) {
+		return nil, io.ErrUnexpectedEOF
+	}
+	return &Packet{Buf: b[:b[0]]}, nil
+}
+
+func BenchmarkConnRead(b *testing.B) {
+	benchmarkConnRead(b, nil)
+}
+
+func benchmarkConnRead(b *testing.B, s Stats) {
+	c := NewConn(&loopReader{data: benchData()}, firstByteCtor)
+	if s != nil {
+		c.SetStats(s, nil)
+	}
+	pkts := make([]interface{}, 64)
+	b.ReportAllocs()
+	b.SetBytes(64 * 64)
+	b.ResetTimer()
+	for i := 0; i < b.N; i++ {
+		if _, err := c.Read(pkts); err != nil {
+			b.Fatal(err)
+		}
+	}
+}
+
+func BenchmarkRingReaderRead(b *testing.B) {
+	r := NewRingReader(&loopReader{data: benchData()}, 1, sizeOfFirstByte,
+		DefaultChunkSize)
+	pkts := make([][]byte, 64)
+	b.ReportAllocs()
+	b.SetBytes(64 * 64)
+	b.ResetTimer()
+	for i := 0; i < b.N; i++ {
+		_, l, err := r.Read(pkts)
+		if err != nil {
+			b.Fatal(err)
+		}
+		l.Release()
+	}
+}
@@ -0,0 +1,153 @@
+package packet
+
+import (
+	"io"
+	"runtime"
+	"sync"
+	"sync/atomic"
+)
+
+const (
+	DefaultQueueLen  = 64
+	DefaultBatchSize = 256
+)
+
+// KeyFunc returns the routing key of a packet. Packets with the same key are
+// handled by the same worker in the order they are read.
+type KeyFunc func(b []byte) uint64
+
+// HandlerFunc handles a batch of packets on a worker. The packets are only
+// valid until the handler returns.
+type HandlerFunc func(worker int, pkts [][]byte)
+
+// ServerOptions configure a Server. Zero values select the defaults.
+type ServerOptions struct {
+	Workers   int // The number of workers, GOMAXPROCS by default.
+	QueueLen  int // The number of batches queued for each worker.
+	BatchSize int // The maximum number of packets read at once.
+}
+
+// serverBatch is the part of a read batch that is handed to a worker. It keeps
+// its own reference to the buffer of the packets.
+type serverBatch struct {
+	pkts  [][]byte
+	lease Lease
+}
+
+// Server reads batches of packets and fans them out to a fixed set of worker
+// goroutines. Packets are routed by their key, and each worker receives at
+// most one batch per read. The queues of workers are bounded, and a slow
+// worker blocks the reader.
+type Server struct {
+	r       FrameReader
+	key     KeyFunc
+	handle  HandlerFunc
+	opts    ServerOptions
+	queues  []chan *serverBatch
+	batches sync.Pool
+	stopped int32
+	wg      sync.WaitGroup
+}
+
+// NewServer creates a server that reads packets from r, routes them with key
+// and handles them with handle.
+func NewServer(r FrameReader, key KeyFunc, handle HandlerFunc,
+	opts ServerOptions) *Server {
+
+	if opts.Workers < 1 {
+		opts.Workers = runtime.GOMAXPROCS(0)
+	}
+	if opts.QueueLen < 1 {
+		opts.QueueLen = DefaultQueueLen
+	}
+	if opts.BatchSize < 1 {
+		opts.BatchSize = DefaultBatchSize
+	}
+
+	s := &Server{
+		r:      r,
+		key:    key,
+		handle: handle,
+		opts:   opts,
+		queues: make([]chan *serverBatch, opts.Workers),
+	}
+	s.batches.New = func() interface{} {
+		return &serverBatch{}
+	}
+	return s
+}
+
+// Workers returns the number of workers of the server.
+func (s *Server) Workers() int {
+	return s.opts.Workers
+}
+
+// Stop makes Serve return once the current read completes and the queued
+// packets are handled. Closing the underlying reader unblocks a pending read.
+func (s *Server) Stop() {
+	atomic.StoreInt32(&s.stopped, 1)
+}
+
+func (s *Server) work(worker int, q chan *serverBatch) {
+	defer s.wg.Done()
+	for b := range q {
+		s.handle(worker, b.pkts)
+		b.lease.Release()
+		for i := range b.pkts {
+			b.pkts[i] = nil
+		}
+		b.pkts = b.pkts[:0]
+		b.lease = Lease{}
+		s.batches.Put(b)
+	}
+}
+
+// Serve reads and dispatches packets until the reader fails or Stop is called,
+// and returns after all the dispatched packets are handled. It returns nil if
+// the reader reaches the end of its input or the server is stopped.
+func (s *Server) Serve() error {
+	for i := range s.queues {
+		s.queues[i] = make(chan *serverBatch, s.opts.QueueLen)
+		s.wg.Add(1)
+		go s.work(i, s.queues[i])
+	}
+
+	pkts := make([][]byte, s.opts.BatchSize)
+	pending := make([]*serverBatch, len(s.queues))
+	workers := uint64(len(s.queues))
+	var err error
+	for atomic.LoadInt32(&s.stopped) == 0 {
+		n, l, rerr := s.r.Read(pkts)
+		for _, p := range pkts[:n] {
+			w := s.key(p) % workers
+			b := pending[w]
+			if b == nil {
+				b = s.batches.Get().(*serverBatch)
+				b.lease = l.Retain()
+				pending[w] = b
+			}
+			b.pkts = append(b.pkts, p)
+		}
+
+		for w, b := range pending {
+			if b != nil {
+				s.queues[w] <- b
+				pending[w] = nil
+			}
+		}
+		l.Release()
+
+		if rerr != nil {
+			if rerr != io.EOF {
+				err = rerr
+			}
+			break
+		}
+	}
+
+	for _, q := range s.queues {
+		close(q)
+	}
+	s.wg.Wait()
+	return err
+}
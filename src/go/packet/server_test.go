@@ -0,0 +1,173 @@
+package packet
+
+import (
+	"bytes"
+	"errors"
+	"io"
+	"sync"
+	"sync/atomic"
+	"testing"
+)
+
+// serverFrames returns n frames of size bytes whose second byte is their key
+// and third byte is their sequence number in the key.
+func serverFrames(n, size, keys int) []byte {
+	data := make([]byte, 0, n*size)
+	for i := 0; i < n; i++ {
+		f := make([]byte, size)
+		f[0] = byte(size)
+		f[1] = byte(i % keys)
+		f[2] = byte(i / keys)
+		data = append(data, f...)
+	}
+	return data
+}
+
+func keyOfSecondByte(b []byte) uint64 {
+	return uint64(b[1])
+}
+
+func TestServer(t *testing.T) {
+	const frames = 1000
+	const keys = 7
+	data := serverFrames(frames, 8, keys)
+	r := NewRingReader(bytes.NewReader(data), 1, sizeOfFirstByte, 64)
+
+	var mu sync.Mutex
+	seqs := make(map[byte][]byte)
+	workers := make(map[byte]int)
+	s := NewServer(r, keyOfSecondByte, func(w int, pkts [][]byte) {
+		mu.Lock()
+		defer mu.Unlock()
+		for _, p := range pkts {
+			if prev, ok := workers[p[1]]; ok && prev != w {
+				t.Errorf("Key %d is handled by workers %d and %d.", p[1], prev, w)
+			}
+			workers[p[1]] = w
+			seqs[p[1]] = append(seqs[p[1]], p[2])
+		}
+	}, ServerOptions{Workers: 3, QueueLen: 2, BatchSize: 5})
+
+	if err := s.Serve(); err != nil {
+		t.Fatal(err)
+	}
+
+	total := 0
+	for k, seq := range seqs {
+		for i, n := range seq {
+			if int(n) != i {
+				t.Errorf("Packets of key %d are handled out of order: %v", k, seq)
+				break
+			}
+		}
+		total += len(seq)
+	}
+	if total != frames {
+		t.Errorf("Server handled %d packets instead of %d.", total, frames)
+	}
+}
+
+// errReader returns its data and then fails.
+type errReader struct {
+	r   io.Reader
+	err error
+}
+
+func (r *errReader) Read(b []byte) (int, error) {
+	n, err := r.r.Read(b)
+	if err == io.EOF {
+		err = r.err
+	}
+	return n, err
+}
+
+func TestServerStop(t *testing.T) {
+	data := serverFrames(100, 4, 3)
+	var handled int32
+	var s *Server
+	r := NewRingReader(bytes.NewReader(data), 1, sizeOfFirstByte, 16)
+	s = NewServer(r, keyOfSecondByte, func(w int, pkts [][]byte) {
+		if atomic.AddInt32(&handled, int32(len(pkts))) >= 10 {
+			s.Stop()
+		}
+	}, ServerOptions{Workers: 2, QueueLen: 1, BatchSize: 2})
+
+	if err := s.Serve(); err != nil {
+		t.Fatal(err)
+	}
+	if n := atomic.LoadInt32(&handled); n < 10 || n == 100 {
+		t.Errorf("Stopped server handled %d packets.", n)
+	}
+
+	fail := errors.New("fail")
+	r = NewRingReader(&errReader{bytes.NewReader(data), fail}, 1,
+		sizeOfFirstByte, 16)
+	handled = 0
+	s = NewServer(r, keyOfSecondByte, func(w int, pkts [][]byte) {
+		atomic.AddInt32(&handled, int32(len(pkts)))
+	}, ServerOptions{})
+	if err := s.Serve(); err != fail {
+		t.Errorf("Server returned %v instead of the error of the reader.", err)
+	}
+	if n := atomic.LoadInt32(&handled); n != 100 {
+		t.Errorf("Server handled %d packets instead of 100 before failing.", n)
+	}
+}
+
+// serverWork simulates handling a packet.
+func serverWork(p []byte) uint64 {
+	h := uint64(14695981039346656037)
+	for i := 0; i < 16; i++ {
+		for _, c := range p {
+			h = (h ^ uint64(c)) * 1099511628211
+		}
+	}
+	return h
+}
+
+const serverBenchFrameSize = 64
+
+func BenchmarkServer(b *testing.B) {
+	data := serverFrames(b.N, serverBenchFrameSize, 251)
+	r := NewRingReader(bytes.NewReader(data), 1, sizeOfFirstByte,
+		DefaultChunkSize)
+	var sinks []uint64
+	s := NewServer(r, keyOfSecondByte, func(w int, pkts [][]byte) {
+		for _, p := range pkts {
+			sinks[w*8] += serverWork(p)
+		}
+	}, ServerOptions{})
+	// Pads the sinks of workers to separate cache lines.
+	sinks = make([]uint64, 8*s.Workers())
+	b.ReportAllocs()
+	b.SetBytes(serverBenchFrameSize)
+	b.ResetTimer()
+	if err := s.Serve(); err != nil {
+		b.Fatal(err)
+	}
+}
+
+// BenchmarkServerLoop reads and handles packets on a single goroutine.
+func BenchmarkServerLoop(b *testing.B) {
+	data := serverFrames(b.N, serverBenchFrameSize, 251)
+	r := NewRingReader(bytes.NewReader(data), 1, sizeOfFirstByte,
+		DefaultChunkSize)
+	pkts := make([][]byte, DefaultBatchSize)
+	var sink uint64
+	b.ReportAllocs()
+	b.SetBytes(serverBenchFrameSize)
+	b.ResetTimer()
+	for {
+		n, l, err := r.Read(pkts)
+		if err == io.EOF {
+			break
+		}
+		if err != nil {
+			b.Fatal(err)
+		}
+		for _, p := range pkts[:n] {
+			sink += serverWork(p)
+		}
+		l.Release()
+	}
+}
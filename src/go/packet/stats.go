@@ -0,0 +1,231 @@
+package packet
+
+import (
+	"expvar"
+	"math/bits"
+	"strconv"
+	"sync"
+	"sync/atomic"
+	"time"
+)
+
+// Stats receives the events of connections. A connection without stats does
+// not measure anything. Stats shared by connections must be safe for
+// concurrent use.
+type Stats interface {
+	// Read is called after each read from the underlying connection with the
+	// number of bytes read and the number of packets delivered.
+	Read(bytes, pkts int)
+	// Write is called after packets are written or queued with their total size
+	// and their number.
+	Write(bytes, pkts int)
+	// Grow is called when the read buffer of a connection is reallocated with
+	// its new size.
+	Grow(size int)
+	// Packet is called for each delivered packet with its kind, its size and
+	// the time since its first byte was read from the underlying connection.
+	Packet(kind string, size int, latency time.Duration)
+}
+
+// ReadReporter reports the reads of a connection to its Stats, and measures
+// the latency of the delivered packets since the read of their first byte.
+// Its zero value reports nothing.
+type ReadReporter struct {
+	Stats            // The stats of the connection, or nil.
+	readAt time.Time // When the first buffered byte was read.
+}
+
+// Report reports a read of bytes that delivered n packets. The first buffered
+// bytes of the read buffer were read before, and the first s bytes were
+// delivered. packet returns the kind and the size of the i-th packet.
+func (r *ReadReporter) Report(n, bytes, buffered, s int,
+	packet func(i int) (string, int)) {
+
+	now := time.Now()
+	r.Read(bytes, n)
+
+	start := 0
+	for i := 0; i < n; i++ {
+		kind, size := packet(i)
+		var latency time.Duration
+		if start < buffered {
+			latency = now.Sub(r.readAt)
+		}
+		r.Packet(kind, size, latency)
+		start += size
+	}
+
+	if s >= buffered {
+		r.readAt = now
+	}
+}
+
+// histogramBuckets is the number of buckets of a histogram, one for zero and
+// one for each bit length of the values.
+const histogramBuckets = 65
+
+// Histogram counts values in power-of-two buckets. Bucket i holds the values
+// in [2^(i-1), 2^i), and bucket 0 holds zero and negative values. Histograms
+// are safe for concurrent use, and their zero value is empty.
+type Histogram struct {
+	buckets [histogramBuckets]uint64
+	sum     int64
+}
+
+// Add adds the value to the histogram.
+func (h *Histogram) Add(v int64) {
+	i := 0
+	if v > 0 {
+		i = bits.Len64(uint64(v))
+	}
+	atomic.AddUint64(&h.buckets[i], 1)
+	atomic.AddInt64(&h.sum, v)
+}
+
+// Count returns the number of values added to the histogram.
+func (h *Histogram) Count() uint64 {
+	var n uint64
+	for i := range h.buckets {
+		n += h.Bucket(i)
+	}
+	return n
+}
+
+// Sum returns the sum of the values added to the histogram.
+func (h *Histogram) Sum() int64 {
+	return atomic.LoadInt64(&h.sum)
+}
+
+// Bucket returns the number of values in bucket i.
+func (h *Histogram) Bucket(i int) uint64 {
+	return atomic.LoadUint64(&h.buckets[i])
+}
+
+// String returns the histogram in JSON, with the non-empty buckets keyed by
+// their exclusive upper bounds.
+func (h *Histogram) String() string {
+	b := []byte(`{"count":`)
+	b = strconv.AppendUint(b, h.Count(), 10)
+	b = append(b, `,"sum":`...)
+	b = strconv.AppendInt(b, h.Sum(), 10)
+	b = append(b, `,"buckets":{`...)
+	first := true
+	for i := range h.buckets {
+		n := h.Bucket(i)
+		if n == 0 {
+			continue
+		}
+		if !first {
+			b = append(b, ',')
+		}
+		first = false
+		b = append(b, '"')
+		if i == histogramBuckets-1 {
+			b = append(b, "inf"...)
+		} else {
+			b = strconv.AppendUint(b, 1<<uint(i), 10)
+		}
+		b = append(b, `":`...)
+		b = strconv.AppendUint(b, n, 10)
+	}
+	return string(append(b, "}}"...))
+}
+
+// ExpvarStats keeps the stats of connections in expvar variables. It is an
+// expvar.Var itself, and can be published with expvar.Publish.
+type ExpvarStats struct {
+	m           expvar.Map
+	reads       expvar.Int
+	readBytes   expvar.Int
+	writes      expvar.Int
+	writeBytes  expvar.Int
+	writePkts   expvar.Int
+	pkts        expvar.Int
+	grows       expvar.Int
+	pktsPerRead Histogram
+	latency     Histogram
+	sizes       expvar.Map
+	kinds       atomic.Value // map[string]*Histogram, copied on write.
+	kindsMu     sync.Mutex
+}
+
+// NewExpvarStats creates empty stats.
+func NewExpvarStats() *ExpvarStats {
+	s := &ExpvarStats{}
+	s.m.Init()
+	s.sizes.Init()
+	s.m.Set("reads", &s.reads)
+	s.m.Set("read_bytes", &s.readBytes)
+	s.m.Set("read_packets", &s.pkts)
+	s.m.Set("packets_per_read", &s.pktsPerRead)
+	s.m.Set("writes", &s.writes)
+	s.m.Set("write_bytes", &s.writeBytes)
+	s.m.Set("write_packets", &s.writePkts)
+	s.m.Set("grows", &s.grows)
+	s.m.Set("latency_ns", &s.latency)
+	s.m.Set("sizes", &s.sizes)
+	return s
+}
+
+func (s *ExpvarStats) Read(bytes, pkts int) {
+	s.reads.Add(1)
+	s.readBytes.Add(int64(bytes))
+	s.pkts.Add(int64(pkts))
+	s.pktsPerRead.Add(int64(pkts))
+}
+
+func (s *ExpvarStats) Write(bytes, pkts int) {
+	s.writes.Add(1)
+	s.writeBytes.Add(int64(bytes))
+	s.writePkts.Add(int64(pkts))
+}
+
+func (s *ExpvarStats) Grow(size int) {
+	s.grows.Add(1)
+}
+
+func (s *ExpvarStats) Packet(kind string, size int, latency time.Duration) {
+	s.latency.Add(int64(latency))
+	s.Sizes(kind).Add(int64(size))
+}
+
+// Sizes returns the histogram of the sizes of the packets of the kind.
+func (s *ExpvarStats) Sizes(kind string) *Histogram {
+	kinds, _ := s.kinds.Load().(map[string]*Histogram)
+	if h, ok := kinds[kind]; ok {
+		return h
+	}
+
+	s.kindsMu.Lock()
+	defer s.kindsMu.Unlock()
+	kinds, _ = s.kinds.Load().(map[string]*Histogram)
+	if h, ok := kinds[kind]; ok {
+		return h
+	}
+	h := &Histogram{}
+	next := make(map[string]*Histogram, len(kinds)+1)
+	for k, v := range kinds {
+		next[k] = v
+	}
+	next[kind] = h
+	s.kinds.Store(next)
+	s.sizes.Set(kind, h)
+	return h
+}
+
+// Latency returns the histogram of the read-to-delivery latencies of packets
+// in nanoseconds.
+func (s *ExpvarStats) Latency() *Histogram {
+	return &s.latency
+}
+
+// PacketsPerRead returns the histogram of the number of packets delivered by
+// each read.
+func (s *ExpvarStats) PacketsPerRead() *Histogram {
+	return &s.pktsPerRead
+}
+
+// String returns the stats in JSON.
+func (s *ExpvarStats) String() string {
+	return s.m.String()
+}
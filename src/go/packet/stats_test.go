@@ -0,0 +1,151 @@
+package packet
+
+import (
+	"encoding/json"
+	"io"
+	"net"
+	"testing"
+	"time"
+)
+
+func TestHistogram(t *testing.T) {
+	var h Histogram
+	for _, v := range []int64{0, 1, 2, 3, 4, 1000} {
+		h.Add(v)
+	}
+	if h.Count() != 6 || h.Sum() != 1010 {
+		t.Errorf("Histogram has %d values with sum %d.", h.Count(), h.Sum())
+	}
+	for i, n := range []uint64{1, 1, 2, 1} {
+		if h.Bucket(i) != n {
+			t.Errorf("Bucket %d has %d values instead of %d.", i, h.Bucket(i), n)
+		}
+	}
+	if h.Bucket(10) != 1 {
+		t.Errorf("Bucket 10 has %d values instead of 1.", h.Bucket(10))
+	}
+
+	want := `{"count":6,"sum":1010,"buckets":{"1":1,"2":1,"4":2,"8":1,"1024":1}}`
+	if h.String() != want {
+		t.Errorf("Histogram is %s instead of %s.", h.String(), want)
+	}
+}
+
+// chunkConn returns a chunk in each read and discards writes.
+type chunkConn struct {
+	net.Conn
+	chunks [][]byte
+}
+
+func (c *chunkConn) Read(b []byte) (int, error) {
+	if len(c.chunks) == 0 {
+		return 0, io.EOF
+	}
+	n := copy(b, c.chunks[0])
+	c.chunks = c.chunks[1:]
+	return n, nil
+}
+
+func (c *chunkConn) Write(b []byte) (int, error) {
+	return len(b), nil
+}
+
+func TestConnStats(t *testing.T) {
+	nc := &chunkConn{chunks: [][]byte{{2, 'a', 3, 'b'}, {'c', 1}}}
+	c := NewConn(nc, firstByteCtor)
+	s := NewExpvarStats()
+	c.SetStats(s, func(p SizedBuffer) string {
+		if p.Size() == 1 {
+			return "empty"
+		}
+		return "data"
+	})
+
+	pkts := make([]interface{}, 4)
+	for _, want := range []int{1, 2} {
+		n, err := c.Read(pkts)
+		if err != nil {
+			t.Fatal(err)
+		}
+		if n != want {
+			t.Errorf("Read %d packets instead of %d.", n, want)
+		}
+	}
+	if err := c.Write(pkts[:2]); err != nil {
+		t.Fatal(err)
+	}
+
+	if s.Sizes("data").Count() != 2 || s.Sizes("data").Sum() != 5 {
+		t.Errorf("Sizes of data packets are %v.", s.Sizes("data"))
+	}
+	if s.Sizes("empty").Count() != 1 || s.Sizes("empty").Sum() != 1 {
+		t.Errorf("Sizes of empty packets are %v.", s.Sizes("empty"))
+	}
+	if s.Latency().Count() != 3 || s.Latency().Bucket(0) < 2 {
+		t.Errorf("Latencies are %v.", s.Latency())
+	}
+	if s.PacketsPerRead().Bucket(1) != 1 || s.PacketsPerRead().Bucket(2) != 1 {
+		t.Errorf("Packets per read are %v.", s.PacketsPerRead())
+	}
+
+	var vars struct {
+		Reads        int64 `json:"reads"`
+		ReadBytes    int64 `json:"read_bytes"`
+		ReadPackets  int64 `json:"read_packets"`
+		Writes       int64 `json:"writes"`
+		WriteBytes   int64 `json:"write_bytes"`
+		WritePackets int64 `json:"write_packets"`
+		Grows        int64 `json:"grows"`
+	}
+	if err := json.Unmarshal([]byte(s.String()), &vars); err != nil {
+		t.Fatalf("Invalid stats %s: %v", s.String(), err)
+	}
+	if vars.Reads != 2 || vars.ReadBytes != 6 || vars.ReadPackets != 3 {
+		t.Errorf("Reads are %+v.", vars)
+	}
+	if vars.Writes != 1 || vars.WriteBytes != 4 || vars.WritePackets != 2 {
+		t.Errorf("Writes are %+v.", vars)
+	}
+	if vars.Grows != 0 {
+		t.Errorf("Buffer grew %d times.", vars.Grows)
+	}
+}
+
+func TestConnStatsGrow(t *testing.T) {
+	data := make([]byte, DefaultBufSize)
+	for i := range data {
+		data[i] = 255
+	}
+	c := NewConn(&chunkConn{chunks: [][]byte{data, data}}, firstByteCtor)
+	s := NewExpvarStats()
+	c.SetStats(s, nil)
+
+	pkts := make([]interface{}, 32)
+	for i := 0; i < 2; i++ {
+		if _, err := c.Read(pkts); err != nil {
+			t.Fatal(err)
+		}
+	}
+	if s.Sizes("").Count() != 2*DefaultBufSize/255 {
+		t.Errorf("Sizes are %v.", s.Sizes(""))
+	}
+	if s.grows.Value() != 1 {
+		t.Errorf("Buffer grew %d times instead of once.", s.grows.Value())
+	}
+}
+
+// nopStats discards all events.
+type nopStats struct{}
+
+func (nopStats) Read(bytes, pkts int)                                {}
+func (nopStats) Write(bytes, pkts int)                               {}
+func (nopStats) Grow(size int)                                       {}
+func (nopStats) Packet(kind string, size int, latency time.Duration) {}
+
+func BenchmarkConnReadNopStats(b *testing.B) {
+	benchmarkConnRead(b, nopStats{})
+}
+
+func BenchmarkConnReadExpvarStats(b *testing.B) {
+	benchmarkConnRead(b, NewExpvarStats())
+}
@@ -0,0 +1,86 @@
+package packet
+
+import (
+	"io"
+	"net"
+)
+
+// FlushPolicy controls when a BatchWriter writes its queued buffers. The zero
+// policy writes every batch as soon as it is queued. Larger limits coalesce
+// batches into fewer system calls at the cost of latency, and queued buffers
+// are only written when a limit is reached or Flush is called.
+type FlushPolicy struct {
+	MaxPackets int // Flush once this many buffers are queued. Zero for no limit.
+	MaxBytes   int // Flush once this many bytes are queued. Zero for no limit.
+}
+
+// Deferred returns whether the policy defers flushes across batches.
+func (p FlushPolicy) Deferred() bool {
+	return p.MaxPackets > 0 || p.MaxBytes > 0
+}
+
+// BatchWriter gathers buffers and writes them with a single vectored write
+// (writev on Linux for TCP and Unix connections) without copying them.
+// Queued buffers must not be modified until they are flushed.
+type BatchWriter struct {
+	Policy FlushPolicy
+	w      io.Writer
+	bufs   net.Buffers
+	bytes  int
+}
+
+// NewBatchWriter creates a batch writer for w.
+func NewBatchWriter(w io.Writer) *BatchWriter {
+	return &BatchWriter{w: w}
+}
+
+// Buffered returns the number of queued bytes.
+func (w *BatchWriter) Buffered() int {
+	return w.bytes
+}
+
+// Queue queues b, and flushes the queue if it reaches the limits of the policy.
+func (w *BatchWriter) Queue(b []byte) error {
+	if len(b) == 0 {
+		return nil
+	}
+
+	w.bufs = append(w.bufs, b)
+	w.bytes += len(b)
+	p := w.Policy
+	if (p.MaxPackets > 0 && len(w.bufs) >= p.MaxPackets) ||
+		(p.MaxBytes > 0 && w.bytes >= p.MaxBytes) {
+		return w.Flush()
+	}
+	return nil
+}
+
+// EndBatch marks the end of a batch of buffers, and flushes the queue unless
+// the policy defers flushes.
+func (w *BatchWriter) EndBatch() error {
+	if w.Policy.Deferred() {
+		return nil
+	}
+	return w.Flush()
+}
+
+// Flush writes the queued buffers. On a partial write, the unwritten part of
+// the queue is kept and written by the next flush.
+func (w *BatchWriter) Flush() error {
+	if w.bytes == 0 {
+		return nil
+	}
+
+	// WriteTo consumes the buffers it writes. It works on a copy of the slice
+	// header so that the backing array of the queue is reused.
+	bufs := w.bufs
+	n, err := bufs.WriteTo(w.w)
+	w.bytes -= int(n)
+	if err != nil {
+		w.bufs = append(w.bufs[:0], bufs...)
+		return err
+	}
+
+	w.bufs = w.bufs[:0]
+	return nil
+}
@@ -0,0 +1,159 @@
+package packet
+
+import (
+	"bytes"
+	"errors"
+	"io"
+	"io/ioutil"
+	"net"
+	"testing"
+)
+
+// shortWriter writes at most limit bytes per call, and fails the first short
+// write.
+type shortWriter struct {
+	bytes.Buffer
+	limit  int
+	failed bool
+}
+
+func (w *shortWriter) Write(b []byte) (int, error) {
+	if len(b) <= w.limit {
+		return w.Buffer.Write(b)
+	}
+
+	n, _ := w.Buffer.Write(b[:w.limit])
+	if !w.failed {
+		w.failed = true
+		return n, errors.New("short write")
+	}
+
+	m, err := w.Write(b[n:])
+	return n + m, err
+}
+
+func TestBatchWriterPolicy(t *testing.T) {
+	var out bytes.Buffer
+	w := NewBatchWriter(&out)
+	w.Policy = FlushPolicy{MaxPackets: 3}
+	for _, b := range []string{"a", "bc", "d", "e"} {
+		if err := w.Queue([]byte(b)); err != nil {
+			t.Fatal(err)
+		}
+	}
+
+	if out.String() != "abcd" || w.Buffered() != 1 {
+		t.Errorf("Invalid output (%q) or buffered bytes (%d).", out.String(),
+			w.Buffered())
+	}
+
+	w.EndBatch()
+	if w.Buffered() != 1 {
+		t.Error("End of batch flushed a deferred policy.")
+	}
+
+	w.Policy = FlushPolicy{}
+	w.EndBatch()
+	if out.String() != "abcde" || w.Buffered() != 0 {
+		t.Errorf("Invalid output (%q) or buffered bytes (%d).", out.String(),
+			w.Buffered())
+	}
+}
+
+func TestBatchWriterPartialWrite(t *testing.T) {
+	out := &shortWriter{limit: 2}
+	w := NewBatchWriter(out)
+	for _, b := range []string{"abc", "de", "fgh"} {
+		w.Queue([]byte(b))
+	}
+
+	if err := w.Flush(); err == nil {
+		t.Error("Partial write did not return an error.")
+	}
+	if w.Buffered() != 6 {
+		t.Errorf("%d bytes are buffered instead of 6.", w.Buffered())
+	}
+
+	if err := w.Flush(); err != nil {
+		t.Fatal(err)
+	}
+	if out.String() != "abcdefgh" || w.Buffered() != 0 {
+		t.Errorf("Invalid output (%q) or buffered bytes (%d).", out.String(),
+			w.Buffered())
+	}
+}
+
+// benchPackets returns n packets of 64 bytes.
+func benchPackets(n int) []SizedBuffer {
+	pkts := make([]SizedBuffer, n)
+	for i := range pkts {
+		pkts[i] = &Packet{Buf: make([]byte, 64)}
+	}
+	return pkts
+}
+
+// benchConn returns a loopback connection whose peer discards its input.
+func benchConn(b *testing.B) net.Conn {
+	l, err := net.Listen("tcp", "127.0.0.1:0")
+	if err != nil {
+		b.Fatal(err)
+	}
+
+	go func() {
+		c, err := l.Accept()
+		l.Close()
+		if err != nil {
+			return
+		}
+		io.Copy(ioutil.Discard, c)
+		c.Close()
+	}()
+
+	c, err := net.Dial("tcp", l.Addr().String())
+	if err != nil {
+		b.Fatal(err)
+	}
+	return c
+}
+
+func BenchmarkWritePerPacket(b *testing.B) {
+	c := benchConn(b)
+	defer c.Close()
+	pkts := benchPackets(64)
+	b.SetBytes(64 * 64)
+	b.ResetTimer()
+	for i := 0; i < b.N; i++ {
+		for _, p := range pkts {
+			if _, err := c.Write(p.Buffer()[:p.Size()]); err != nil {
+				b.Fatal(err)
+			}
+		}
+	}
+}
+
+func benchmarkConnWrite(b *testing.B, p FlushPolicy) {
+	c := benchConn(b)
+	defer c.Close()
+	pc := NewConn(c, nil)
+	pc.SetFlushPolicy(p)
+	pkts := make([]interface{}, 64)
+	for i, p := range benchPackets(64) {
+		pkts[i] = p
+	}
+	b.SetBytes(64 * 64)
+	b.ResetTimer()
+	for i := 0; i < b.N; i++ {
+		if err := pc.Write(pkts); err != nil {
+			b.Fatal(err)
+		}
+	}
+	pc.Flush()
+}
+
+func BenchmarkConnWriteVectored(b *testing.B) {
+	benchmarkConnWrite(b, FlushPolicy{})
+}
+
+func BenchmarkConnWriteDeferred(b *testing.B) {
+	benchmarkConnWrite(b, FlushPolicy{MaxPackets: 1024})
+}
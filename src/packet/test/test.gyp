@@ -63,8 +63,10 @@
       'sources': [
         'simple.packet',
         'including.packet',
+        'dispatch.packet',
         '<(packet_output_dir)/simple.go',
         '<(packet_output_dir)/including.go',
+        '<(packet_output_dir)/dispatch.go',
       ],
       'includes': [
         '../packetgen_go.gypi',
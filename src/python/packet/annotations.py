@@ -45,6 +45,11 @@ class Annotation(object):  # pylint: disable=R0903
     ''' @param model Is the the annotation model parsed in packet. '''
     self._model = model
 
+  def get_enum_items(self):
+    ''' Returns the enum items referenced in the annotation parameters. '''
+    return [param.enum_item for param in self._model.params
+            if param.enum_item]
+
 def create_packet_level_annotation(packet, annotation_model):
   ''' Creates a packet level annotation. '''
   assert packet and annotation_model, \
@@ -107,6 +112,12 @@ class TypeSelectorAnnotation(PacketLevelAnnotation):
       cond.append((field, param.value))
     return cond
 
+  def get_enums(self):
+    ''' Returns a list of tuples from field to the enum of its value, for the
+        values that are enum items. '''
+    return [(self.__find_field(param.name), param.enum_item.enum)
+            for param in self._model.params if param.enum_item]
+
 
 @packet_level_annotation('custom_size')  # pylint: disable=R0903
 class CustomSizeAnnotation(PacketLevelAnnotation):
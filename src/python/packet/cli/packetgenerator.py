@@ -34,6 +34,12 @@ except ImportError:
 from packet import generator, boot_packet
 from packet.generator import get_generator
 from packet.generator import base
+from packet.generator import layout
+from packet.generator.processor import EndianProcessor
+from packet.generator.processor import OffsetProcessor
+from packet.generator.processor import SizeProcessor
+from packet.parser.dependency import DependencyIndex
+from packet.parser.model import parse_file
 
 LOG = logging.getLogger('packet.cli.PacketGenerator')
 
@@ -44,7 +50,7 @@ def parse_args():
   ''' Parses the arguments. '''
   parser = argparse.ArgumentParser(prog=__PROG_NAME, description=
                                    'Generates code from packet files.')
-  parser.add_argument('-l', '--lang', type=str, nargs=1, required=True,
+  parser.add_argument('-l', '--lang', type=str, nargs=1,
                       choices=generator.supported_languages(),
                       help='generate codes in the specified language.')
   parser.add_argument('-e', '--extension', type=str, nargs='+',
@@ -58,13 +64,71 @@ def parse_args():
                       help='generate codes for all included packets.')
   parser.add_argument('-x', '--include_prefix', type=str, nargs=1,
                       help='include prefix for generated code.')
+  parser.add_argument('-b', '--benchmark', action='store_true',
+                      help='also generate benchmarks for the generated code.')
+  parser.add_argument('--aio', action='store_true',
+                      help='also generate asyncio adapters for the root '
+                           'packets (Python). They require Python 3.7.')
+  parser.add_argument('--offset-cache', action='store_true',
+                      help='cache the offsets of fields that follow '
+                           'variable-size fields in each packet view (Go).')
   parser.add_argument('-v', '--verbose', action='store_true',
                       help='verbose logging.')
+  parser.add_argument('--affected', type=str, nargs=1, metavar='packet-file',
+                      help='print the namespaces (and their generated files) '
+                           'affected by a change in the given packet file, '
+                           'instead of generating code.')
+  parser.add_argument('--layout-report', action='store_true',
+                      help='print the fields with dynamic offsets ranked by '
+                           'their access cost, instead of generating code.')
+  parser.add_argument('--all-fields', action='store_true',
+                      help='also list the fields with constant offsets in the '
+                           'layout report.')
   parser.add_argument('--version', action='version', version='%(prog)s 2.0')
   parser.add_argument('packet', type=str, nargs='+', metavar='packet-file',
                       help='The packet file(s).')
 
-  return parser.parse_args()
+  args = parser.parse_args()
+  if not args.lang and not args.affected and not args.layout_report:
+    parser.error('argument -l/--lang is required')
+  return args
+
+def print_affected(args, packet_generator):
+  ''' Prints the namespaces affected by a change in args.affected, one per
+      line and followed by their generated files when the language and the
+      output directory are known. '''
+  index = DependencyIndex([parse_file(f) for f in args.packet])
+  pom = index.find_pom(args.affected[0])
+  if not pom:
+    LOG.error('%s is not included by any of %s', args.affected[0],
+              ' '.join(args.packet))
+    sys.exit(1)
+
+  for namespace in index.affected_namespaces(pom):
+    outputs = []
+    if packet_generator and args.output:
+      outputs = packet_generator.get_output_files(index.poms[namespace],
+                                                  args.output[0])
+    print ' '.join([namespace] + outputs)
+
+def print_layout_report(args):
+  ''' Prints the access costs of fields in the packet files (and in included
+      files when args.recursive is set). '''
+  poms = [parse_file(f) for f in args.packet]
+  for pom in poms:
+    if not pom:
+      LOG.error('Cannot parse all the packet files: %s', ' '.join(args.packet))
+      sys.exit(1)
+
+    if args.recursive:
+      poms += [p for p in pom.includes.values() if p not in poms]
+
+    for step in [SizeProcessor(), OffsetProcessor(), EndianProcessor()]:
+      step.process(pom)
+
+    for line in layout.format_report(layout.analyze(pom),
+                                      args.all_fields):
+      print line
 
 def main():
   ''' Main function for packet-gen. '''
@@ -74,14 +138,23 @@ def main():
 
   boot_packet(packet_path, args.verbose)
 
-  lang = args.lang[0]
+  packet_generator_class = None
+  if args.lang:
+    lang = args.lang[0]
+    LOG.debug('Trying to find the generator for %s', lang)
+    packet_generator_class = get_generator(lang)
 
-  LOG.debug('Trying to find the generator for %s', lang)
-  packet_generator_class = get_generator(lang)
+    if not packet_generator_class:
+      LOG.error('Cannot find the generator for %s', lang)
+      sys.exit(1)
 
-  if not packet_generator_class:
-    LOG.error('Cannot find the generator for %s', lang)
-    sys.exit(1)
+  if args.affected:
+    print_affected(args, packet_generator_class and packet_generator_class())
+    return
+
+  if args.layout_report:
+    print_layout_report(args)
+    return
 
   LOG.debug('Using packet path: %s ', str(packet.packet_paths))
 
@@ -89,6 +162,9 @@ def main():
           base.RECURSIVE_OPT_NAME: args.recursive,
           base.EXTENSION_FOLDER: args.extension,
           base.INCLUDE_PREFIX_OPT_NAME: args.include_prefix,
+          base.BENCHMARK_OPT_NAME: args.benchmark,
+          base.AIO_OPT_NAME: args.aio,
+          base.OFFSET_CACHE_OPT_NAME: args.offset_cache,
           }
 
   packet_generator = packet_generator_class()
@@ -23,6 +23,7 @@ __author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
 from packet.generator.c import CGenerator
 from packet.generator.cpp import CppGenerator
 from packet.generator.go import GoGenerator
+from packet.generator.python import PythonGenerator
 
 # TODO(soheil): Add styles for each language.
 __GENERATORS = {
@@ -31,7 +32,7 @@ __GENERATORS = {
                 'cpp': CppGenerator,
                 'go': GoGenerator,
                 'java': None,
-                'python': None,
+                'python': PythonGenerator,
                 }
 
 def supported_languages():
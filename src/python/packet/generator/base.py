@@ -37,6 +37,72 @@ LOG = logging.getLogger('packet.generator.base')
 RECURSIVE_OPT_NAME = 'recursive'
 EXTENSION_FOLDER = 'extension_folder'
 INCLUDE_PREFIX_OPT_NAME = 'include_prefix'
+BENCHMARK_OPT_NAME = 'benchmark'
+AIO_OPT_NAME = 'aio'
+OFFSET_CACHE_OPT_NAME = 'offset_cache'
+
+# Enums whose values span at most this many slots per item are looked up in
+# dense tables.
+ENUM_DENSITY = 2
+
+def get_enum_table(enum):
+  ''' Returns the value to name table of the enum as (base, names) if the
+      values are compact, where names[i] is the name of base + i or None, and
+      otherwise as (None, [(value, name)]) sorted by value. Items with the same
+      value are named after the first item. '''
+  items = []
+  for name, item in enum.items.iteritems():
+    if item.value not in [v for v, _ in items]:
+      items.append((item.value, name))
+  items.sort()
+  if not items:
+    return (None, [])
+
+  base = items[0][0]
+  span = items[-1][0] - base + 1
+  if span > ENUM_DENSITY * len(items):
+    return (None, items)
+
+  names = [None] * span
+  for value, name in items:
+    names[value - base] = name
+  return (base, names)
+
+def get_enum_names(enum):
+  ''' Returns a list of (name, value) of the enum items sorted by name. '''
+  return sorted((name, item.value) for name, item in enum.items.iteritems())
+
+def get_chain_fields(packet):
+  ''' Returns the fields of the packet and its ancestors in the order they are
+      laid out. '''
+  fields = []
+  while packet:
+    fields = packet.fields + fields
+    packet = packet.parent
+  return fields
+
+def get_value_fields(packet):
+  ''' Returns the fields of the packet and its ancestors whose values are not
+      derived from other fields. Size and count fields and type selectors are
+      derived. '''
+  derived = set(field for field, _ in packet.get_type_selector_condition(True))
+  fields = get_chain_fields(packet)
+  for field in fields:
+    derived.add(field.packet.get_size_field())
+    derived.add(field.get_count_field())
+    derived.add(field.get_size_field())
+  return [field for field in fields if field not in derived]
+
+def get_validated_fields(packet):
+  ''' Returns the fields of the packet and its ancestors whose bounds are
+      checked when the packet is validated. The constant-size fields at
+      constant offsets within the minimum size of the packet are omitted. '''
+  validated = []
+  for field in get_chain_fields(packet):
+    if validated or not field.has_const_size() or \
+        field.offset[0] + field.get_const_size() > packet.min_size:
+      validated.append(field)
+  return validated
 
 class PacketGenerator(object):  # pylint: disable=all
   ''' The base class for all genrerators. All packet code generators must
@@ -96,6 +162,13 @@ class PacketGenerator(object):  # pylint: disable=all
     pom = parse_file(packet_file)
     return pom
 
+  def get_output_files(self, pom, output_dir):  # pylint: disable=W0613,R0201
+    ''' Returns the list of files generated for the packet object model.
+        Generators should override this method to enable dependency queries.
+        @param pom: The packet object model.
+        @param output_dir: The output directory for generated code. '''
+    return []
+
   @abstractmethod
   def generate_packet(self, pom, output_dir, opt):
     ''' Generate code for the packet.
@@ -33,7 +33,7 @@ __HEADER_SUFFIX = '.h'
 __SOURCE_SUFFIX = '.cc'
 _PACKET_BASE = '::cyrus::io::Packet'
 
-def __get_output_file_path(pom, output_dir):
+def _get_output_file_path(pom, output_dir):
   ''' Generates the header and source file names.
       @param pom The packet object model.
       @param output_dir The output directory.
@@ -45,7 +45,7 @@ def __get_output_file_path(pom, output_dir):
 def _get_output_files(pom, output_dir):
   ''' Returns the output file path.
       @return a tuple of header and source paths. '''
-  header_path, source_path = __get_output_file_path(pom, output_dir)
+  header_path, source_path = _get_output_file_path(pom, output_dir)
   return (open(header_path, 'w'), open(source_path, 'w'))
 
 def _get_qualified_name(namespace, class_name):
@@ -75,6 +75,9 @@ class CppGenerator(PacketGenerator):
     self.__indent_level = 0
     self.__indent_width = 2
 
+  def get_output_files(self, pom, output_dir):
+    return list(_get_output_file_path(pom, output_dir))
+
   def generate_packet(self, pom, output_dir, opts):  # pylint: disable=W0613
     ''' Generates code for a single packet object model. '''
     header_file, source_file = _get_output_files(pom, output_dir)
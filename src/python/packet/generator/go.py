@@ -24,12 +24,17 @@ import logging
 import os.path
 
 from packet.generator.base import PacketGenerator
+from packet.generator.base import BENCHMARK_OPT_NAME
 from packet.generator.base import INCLUDE_PREFIX_OPT_NAME
+from packet.generator.base import OFFSET_CACHE_OPT_NAME
+from packet.generator.base import get_chain_fields
+from packet.generator.base import get_value_fields
 from packet import types
 
 LOG = logging.getLogger('packet.generator.go')
 
 __GO_SUFFIX = '.go'
+__BENCH_SUFFIX = '_bench_test.go'
 
 BUILTIN_TYPES = {
   types.CHAR.name: 'byte',
@@ -43,14 +48,129 @@ BUILTIN_TYPES = {
   types.UNSIGNED_INT_64.name: 'uint64',
 }
 
-
-def _get_output_file(pom, output_dir):
-  ''' Returns the go output file for this packet object model. '''
-  directory = os.path.join(output_dir, pom.namespace)
+def get_offset_slots(packet):
+  ''' Returns a dictionary of the fields of the packet and its ancestors that
+      follow a variable-size field to their slots in the offset cache. The
+      slots of a packet extend the slots of its parent. '''
+  slots = {}
+  dynamic = False
+  for field in get_chain_fields(packet):
+    if dynamic:
+      slots[field] = len(slots)
+    if not field.get_const_size():
+      dynamic = True
+  return slots
+
+def get_size_slots(packet):
+  ''' Returns a dictionary of the fields of the packet and its ancestors that
+      do not have a constant size to their slots in the validated view of the
+      packet. '''
+  slots = {}
+  for field in get_chain_fields(packet):
+    if not field.has_const_size():
+      slots[field] = len(slots)
+  return slots
+
+def get_field_enums(packet):
+  ''' Returns a dictionary of the fields of the packet and its ancestors to
+      the enums of their values in the type selectors of the packet. '''
+  enums = {}
+  while packet:
+    annot = packet.annotations.get('type_selector')
+    if annot:
+      for field, enum in annot.get_enums():
+        enums.setdefault(field, enum)
+    packet = packet.parent
+  return enums
+
+def get_enum_range(enum, signed):
+  ''' Returns the smallest and the largest values of the items of the enum
+      that fit in a signed or unsigned field, or None if there is no such item.
+  '''
+  values = [item.value for item in enum.items.values()
+            if signed or item.value >= 0]
+  if not values:
+    return None
+
+  return (min(values), max(values))
+
+def get_builder_fields(packet):
+  ''' Returns the fields of the packet and its ancestors that are set by the
+      builder of the packet, or None if the packet has no builder. Size and
+      count fields and type selectors are derived by the builder. '''
+  if packet.is_const_size() or packet.is_custom_sized() or packet.is_padded():
+    return None
+
+  return get_value_fields(packet)
+
+def get_dispatch_packets(pom):
+  ''' Returns a list of (packet, subtypes) for the packets that have subtypes
+      in the packet object model, where subtypes are the direct children of
+      the packet in the packet object model. '''
+  parents = []
+  for packet in pom.packets.values():
+    if packet.parent and packet.parent not in parents:
+      parents.append(packet.parent)
+
+  return [(parent, [child for child in parent.children
+                    if child.pom.namespace == pom.namespace])
+          for parent in parents]
+
+def get_dispatch_switch(children):
+  ''' Returns the selector field and a list of (value, child) if all the
+      children are selected by distinct values of the same field, and
+      otherwise None. '''
+  field = None
+  cases = []
+  for child in children:
+    conditions = child.get_type_selector_condition()
+    if len(conditions) != 1:
+      return None
+
+    child_field, value = conditions[0]
+    if field and child_field != field:
+      return None
+    if value in [v for v, _ in cases]:
+      return None
+
+    field = child_field
+    cases.append((value, child))
+  return (field, cases) if field else None
+
+def check_kind_names(pom):
+  ''' Raises a ValueError if the Kind type and constants generated for the
+      dispatch functions of the packet object model collide with each other or
+      with the names of its packets, enums and enum items. '''
+  if not get_dispatch_packets(pom):
+    return
+
+  kinds = ['Kind', 'KindUnknown', 'kindNames'] + \
+      ['Kind' + name for name in pom.packets]
+  names = list(pom.packets) + list(pom.enums)
+  for name, enum in pom.enums.items():
+    names += list(enum.items) + [name[0].lower() + name[1:] + 'Names']
+
+  for kind in kinds:
+    if kinds.count(kind) > 1 or kind in names:
+      raise ValueError('%s collides with the dispatch kinds of %s' %
+                       (kind, pom.namespace))
+
+def _get_output_file_path(pom, output_dir):
+  ''' Returns the path of the go output file for this packet object model. '''
+  return os.path.join(output_dir, pom.namespace, pom.namespace + __GO_SUFFIX)
+
+def _get_bench_file_path(pom, output_dir):
+  ''' Returns the path of the go benchmark file for this packet object model.
+  '''
+  return os.path.join(output_dir, pom.namespace, pom.namespace + __BENCH_SUFFIX)
+
+def _get_output_file(path):
+  ''' Returns the go output file at the path, creating its directory. '''
+  directory = os.path.dirname(path)
   if not os.path.exists(directory):
     os.makedirs(directory)
 
-  return open(os.path.join(directory, pom.namespace + __GO_SUFFIX), 'w')
+  return open(path, 'w')
 
 class GoGenerator(PacketGenerator):
   ''' Generates Go code for packets. '''
@@ -58,17 +178,26 @@ class GoGenerator(PacketGenerator):
   def __init__(self):
     super(GoGenerator, self).__init__()
 
+  def get_output_files(self, pom, output_dir):
+    return [_get_output_file_path(pom, output_dir)]
+
   def generate_packet(self, pom, output_dir, opts):  # pylint: disable=W0613
     ''' Generates Go code for a single packet object model. '''
-    src_file = _get_output_file(pom, output_dir)
-
-    LOG.debug('Generating Go code for %s in %s', pom.namespace, src_file.name)
-
+    check_kind_names(pom)
     template_lookup = self._get_template_lookup(opts)
-
-    template = template_lookup.get_template('go.template')
-    src_file.write(template.render(pom=pom,
-                                   include_prefix=opts.get(
-                                       INCLUDE_PREFIX_OPT_NAME)).strip())
-    src_file.close()
+    templates = [('go.template', _get_output_file_path(pom, output_dir))]
+    if opts.get(BENCHMARK_OPT_NAME):
+      templates.append(('go-bench.template',
+                        _get_bench_file_path(pom, output_dir)))
+
+    for template_name, path in templates:
+      src_file = _get_output_file(path)
+      LOG.debug('Generating Go code for %s in %s', pom.namespace,
+                src_file.name)
+
+      template = template_lookup.get_template(template_name)
+      src_file.write(template.render(
+          pom=pom, include_prefix=opts.get(INCLUDE_PREFIX_OPT_NAME),
+          offset_cache=opts.get(OFFSET_CACHE_OPT_NAME) == True).strip())
+      src_file.close()
 
@@ -0,0 +1,147 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Field access-cost analysis based on the offsets computed by
+    OffsetProcessor. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+from packet.utils.types import enum
+
+# Kinds of dynamic hops in a field offset. An offset of (c, [x, y]) is
+# computed as c + size(x) + size(y), and the cost of size() depends on how the
+# size of the intermediate field is stored in the packet.
+HOP_KINDS = enum(SIZE_FIELD='size', SUB_PACKET='packet', COUNT='count',
+                 IMPLICIT='implicit')
+
+def _hop_kind(field):
+  ''' Returns the kind of hop that the field adds to the offsets of the fields
+      after it. '''
+  if not field.is_repeated():
+    return HOP_KINDS.SUB_PACKET
+
+  if field.get_size_field():
+    return HOP_KINDS.SIZE_FIELD
+
+  if field.get_count_field():
+    return HOP_KINDS.COUNT
+
+  return HOP_KINDS.IMPLICIT
+
+class FieldAccessCost(object):  # pylint: disable=R0903
+  ''' The cost of accessing a field in the generated code. '''
+  def __init__(self, field, hops, calls):
+    ''' @param field: The field.
+        @param hops: List of (intermediate field, hop kind) tuples.
+        @param calls: Number of size/offset calls to compute the offset. '''
+    self.field = field
+    self.hops = hops
+    self.calls = calls
+    self.suggestions = []
+
+  def get_count_hops(self):
+    ''' Returns the intermediate fields that are walked element by element. '''
+    return [f for f, kind in self.hops if kind == HOP_KINDS.COUNT]
+
+  def get_complexity(self):
+    ''' Returns the worst-case complexity of accessing the field, where n is
+        the number of elements in the counted repeated fields. '''
+    return 'O(n)' if self.get_count_hops() else 'O(1)'
+
+  def get_rank(self):
+    ''' Returns a tuple that sorts the costs from the cheapest to the most
+        expensive. '''
+    return (len(self.get_count_hops()), self.calls, len(self.hops))
+
+def _offset_calls(field, memo):
+  ''' Returns the number of size and offset calls the generated code makes to
+      compute the offset of the field. '''
+  if field in memo:
+    return memo[field]
+
+  calls = 1
+  for hop in field.offset[1]:
+    calls += 1
+    # Sizes of sub-packets and counted arrays are read at their own offsets.
+    if _hop_kind(hop) in (HOP_KINDS.SUB_PACKET, HOP_KINDS.COUNT):
+      calls += _offset_calls(hop, memo)
+
+  memo[field] = calls
+  return calls
+
+def _suggest(cost):
+  ''' Fills the layout suggestions that would make accessing the field O(1).
+  '''
+  field = cost.field
+  for hop in cost.get_count_hops():
+    cost.suggestions.append('add a @size(%s) field to %s to read its size in '
+                            'O(1)' % (hop.name, hop.packet.name))
+
+  if not field.get_const_size():
+    return
+
+  own_hops = [f for f, _ in cost.hops if f.packet == field.packet]
+  if not own_hops:
+    return
+
+  parent_hops = len(cost.hops) - len(own_hops)
+  cost.suggestions.append(
+      'move %s before %s to read it at %s offset' %
+      (field.name, own_hops[0].name,
+       'a constant' if not parent_hops else
+       'an offset with %d dynamic hop(s)' % parent_hops))
+
+def analyze_packet(packet, memo=None):
+  ''' Returns the access costs of the fields defined in the packet. The model
+      must be processed by OffsetProcessor. '''
+  memo = {} if memo is None else memo
+  costs = []
+  for field in packet.fields:
+    hops = [(f, _hop_kind(f)) for f in field.offset[1]]
+    cost = FieldAccessCost(field, hops, _offset_calls(field, memo))
+    _suggest(cost)
+    costs.append(cost)
+  return costs
+
+def analyze(pom):
+  ''' Returns the access costs of all the fields in the pom, from the most
+      expensive to the cheapest. '''
+  memo = {}
+  costs = []
+  for packet in pom.packets.values():
+    costs += analyze_packet(packet, memo)
+  return sorted(costs, key=lambda c: c.get_rank(), reverse=True)
+
+def format_report(costs, show_all=False):
+  ''' Formats the access costs as a list of lines.
+      @param show_all: Whether to include the fields with constant offsets. '''
+  lines = []
+  for cost in costs:
+    if not cost.hops and not show_all:
+      continue
+
+    field = cost.field
+    path = ' + '.join(['%d' % field.offset[0]] +
+                      ['%s.%s(%s)' % (f.packet.name, f.name, kind)
+                       for f, kind in cost.hops])
+    lines.append('%s.%s.%s: %s, %d hop(s), %d call(s): %s' %
+                 (field.packet.pom.namespace, field.packet.name, field.name,
+                  cost.get_complexity(), len(cost.hops), cost.calls, path))
+    for suggestion in cost.suggestions:
+      lines.append('  - %s' % suggestion)
+  return lines
@@ -0,0 +1,193 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' The default generator for Python. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import logging
+import os.path
+
+from packet.generator.base import PacketGenerator
+from packet.generator.base import get_chain_fields
+from packet.generator.base import get_value_fields
+from packet.generator.base import AIO_OPT_NAME
+from packet.generator.base import BENCHMARK_OPT_NAME
+from packet.generator.base import INCLUDE_PREFIX_OPT_NAME
+from packet import types
+from packet.types import BuiltInType
+
+LOG = logging.getLogger('packet.generator.python')
+
+__PY_SUFFIX = '.py'
+__BENCH_SUFFIX = '_bench.py'
+__AIO_SUFFIX = '_aio.py'
+
+# Builtin types to struct format characters.
+BUILTIN_TYPES = {
+  types.CHAR.name: 'b',
+  types.INT_8.name: 'b',
+  types.INT_16.name: 'h',
+  types.INT_32.name: 'i',
+  types.INT_64.name: 'q',
+  types.UNSIGNED_INT_8.name: 'B',
+  types.UNSIGNED_INT_16.name: 'H',
+  types.UNSIGNED_INT_32.name: 'I',
+  types.UNSIGNED_INT_64.name: 'Q',
+}
+
+# Struct format characters to numpy type codes.
+NUMPY_TYPES = {
+  'b': 'i1',
+  'B': 'u1',
+  'h': 'i2',
+  'H': 'u2',
+  'i': 'i4',
+  'I': 'u4',
+  'q': 'i8',
+  'Q': 'u8',
+}
+
+def get_endian(packet):
+  ''' Returns the struct byte order character of the packet. '''
+  return '>' if packet.big_endian else '<'
+
+def get_struct_format(field):
+  ''' Returns the struct format of a builtin field, or of a constant-size array
+      of builtin elements. '''
+  count = field.get_repeated_count() if field.is_const_size_repeated() else ''
+  return '%s%s%s' % (get_endian(field.packet), count,
+                     BUILTIN_TYPES[field.type.name])
+
+def get_struct_name(field):
+  ''' Returns the name of the precompiled struct for the field. Fields with the
+      same format share the same struct. '''
+  count = field.get_repeated_count() if field.is_const_size_repeated() else 0
+  return '_%s_%s%s' % ('BE' if field.packet.big_endian else 'LE',
+                       'X%d_' % count if count else '', field.type.name.upper())
+
+def get_fixed_layout(packet):
+  ''' Returns the layout of the longest prefix of the packet (including its
+      parents' fields) that has a constant offset. The layout is a tuple of the
+      struct format and the names of the builtin fields in the format. Other
+      constant-size fields are skipped as padding bytes. '''
+  fmt = get_endian(packet)
+  names = []
+  for field in get_chain_fields(packet):
+    size = field.get_const_size()
+    if not size or field.packet.big_endian != packet.big_endian:
+      break
+
+    if isinstance(field.type, BuiltInType) and not field.is_repeated():
+      fmt += BUILTIN_TYPES[field.type.name]
+      names.append(field.name)
+    else:
+      fmt += '%dx' % size
+  return (fmt, names)
+
+def get_encoder_fields(packet):
+  ''' Returns the fields of the packet and its ancestors that are passed to
+      write_into, or None if the packet cannot be encoded from values. Size and
+      count fields and type selectors are derived from the other fields. '''
+  if packet.is_custom_sized() or packet.is_padded():
+    return None
+
+  return get_value_fields(packet)
+
+def get_dtype_fields(packet):
+  ''' Returns the fields of a constant-size packet (including its parents'
+      fields) with their offsets, as a list of (field, offset) tuples. '''
+  offset = 0
+  res = []
+  for field in get_chain_fields(packet):
+    res.append((field, offset))
+    offset += field.get_const_size()
+  return res
+
+def get_dtype_format(field):
+  ''' Returns the numpy type code of a builtin field, or None if the field is
+      not a builtin. Constant-size arrays keep the element type code. '''
+  if not isinstance(field.type, BuiltInType):
+    return None
+
+  return '%s%s' % (get_endian(field.packet),
+                   NUMPY_TYPES[BUILTIN_TYPES[field.type.name]])
+
+def get_dtype_packets(pom):
+  ''' Returns the constant-size packets of the pom, ordered such that every
+      packet comes after the packets of the same pom that it embeds. '''
+  ordered = []
+  def visit(packet):
+    if packet in ordered or packet.pom != pom or not packet.is_const_size():
+      return
+
+    for field, _ in get_dtype_fields(packet):
+      if not isinstance(field.type, BuiltInType):
+        visit(field.type)
+    ordered.append(packet)
+
+  for packet in pom.packets.values():
+    visit(packet)
+  return ordered
+
+def _get_output_file_path(pom, output_dir):
+  ''' Returns the path of the python output file for this packet object model.
+  '''
+  return os.path.join(output_dir, pom.namespace + __PY_SUFFIX)
+
+def _get_bench_file_path(pom, output_dir):
+  ''' Returns the path of the python benchmark file for this packet object
+      model. '''
+  return os.path.join(output_dir, pom.namespace + __BENCH_SUFFIX)
+
+def _get_aio_file_path(pom, output_dir):
+  ''' Returns the path of the python asyncio adapters for this packet object
+      model. '''
+  return os.path.join(output_dir, pom.namespace + __AIO_SUFFIX)
+
+class PythonGenerator(PacketGenerator):
+  ''' Generates Python code for packets. '''
+
+  def __init__(self):
+    super(PythonGenerator, self).__init__()
+
+  def get_output_files(self, pom, output_dir):
+    return [_get_output_file_path(pom, output_dir)]
+
+  def generate_packet(self, pom, output_dir, opts):
+    ''' Generates Python code for a single packet object model. '''
+    template_lookup = self._get_template_lookup(opts)
+    include_prefix = opts.get(INCLUDE_PREFIX_OPT_NAME)
+
+    templates = [('python.template', _get_output_file_path(pom, output_dir))]
+    if opts.get(AIO_OPT_NAME):
+      templates.append(('python-aio.template',
+                        _get_aio_file_path(pom, output_dir)))
+    if opts.get(BENCHMARK_OPT_NAME):
+      templates.append(('python-bench.template',
+                        _get_bench_file_path(pom, output_dir)))
+
+    for template_name, path in templates:
+      src_file = open(path, 'w')
+      LOG.debug('Generating Python code for %s in %s', pom.namespace,
+                src_file.name)
+      template = template_lookup.get_template(template_name)
+      src_file.write(template.render(pom=pom,
+                                     include_prefix=include_prefix).strip())
+      src_file.write('\n')
+      src_file.close()
@@ -0,0 +1,152 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Reverse dependency index of packet object models. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+from collections import OrderedDict
+import logging
+import os.path
+
+from packet.parser.model import Packet
+
+LOG = logging.getLogger('packet.parser.dependency')
+
+class DependencyIndex(object):
+  ''' Indexes a set of POMs (and everything they include) in the reverse
+      direction: which packets extend a packet, which fields embed a packet as
+      their type, which files include a file, and which packets select their
+      type using an enum item. '''
+  def __init__(self, poms=None):
+    ''' @param poms: The initial list of POMs to index. '''
+    self.poms = OrderedDict()
+    self.__extenders = {}
+    self.__embedders = {}
+    self.__includers = {}
+    self.__enum_users = {}
+    for pom in poms or []:
+      self.add(pom)
+
+  def add(self, pom):
+    ''' Adds a POM and, recursively, its includes to the index. '''
+    if not pom or pom.namespace in self.poms:
+      return
+
+    for included_pom in pom.includes.values():
+      self.add(included_pom)
+      self.__includers.setdefault(included_pom.namespace, []).append(pom)
+    self.poms[pom.namespace] = pom
+
+    for enum in pom.enums.values():
+      for item in enum.items.values():
+        for ref in item.references:
+          self.__enum_users.setdefault(ref.enum.pom.namespace, []).append(
+              enum.pom)
+
+    for packet in pom.packets.values():
+      if packet.parent:
+        self.__extenders.setdefault(packet.parent, []).append(packet)
+
+      for field in packet.fields:
+        if isinstance(field.type, Packet):
+          self.__embedders.setdefault(field.type, []).append(field)
+
+      for annot in packet.annotations.values():
+        for item in annot.get_enum_items():
+          self.__enum_users.setdefault(item.enum.pom.namespace, []).append(
+              pom)
+
+  def find_pom(self, name):
+    ''' Finds an indexed POM by its namespace or by its packet file.
+        @param name: The namespace, or the packet file path. '''
+    pom = self.poms.get(name)
+    if pom:
+      return pom
+
+    for pom in self.poms.values():
+      if pom.file_path == name:
+        return pom
+
+    namespace = os.path.splitext(os.path.basename(name))[0]
+    return self.poms.get(namespace)
+
+  def extenders(self, packet, recursive=False):
+    ''' Returns the packets that extend the packet.
+        @param recursive: Whether to include the indirectly derived packets. '''
+    return self.__closure(packet, lambda p: self.__extenders.get(p, []),
+                          recursive)
+
+  def embedders(self, packet):
+    ''' Returns the fields that use the packet as their type. '''
+    return list(self.__embedders.get(packet, []))
+
+  def includers(self, pom, recursive=False):
+    ''' Returns the POMs that include the pom.
+        @param recursive: Whether to include the indirect includers. '''
+    return self.__closure(pom,
+                          lambda p: self.__includers.get(p.namespace, []),
+                          recursive)
+
+  def affected_packets(self, pom):
+    ''' Returns the packets whose generated code depends on the definitions
+        of the pom: the packets of the pom and, transitively, the packets that
+        extend them or embed them in a field. '''
+    affected = []
+    pending = list(pom.packets.values())
+    while pending:
+      packet = pending.pop(0)
+      if packet in affected:
+        continue
+
+      affected.append(packet)
+      pending += self.__extenders.get(packet, [])
+      pending += [f.packet for f in self.__embedders.get(packet, [])]
+    return affected
+
+  def affected_namespaces(self, pom):
+    ''' Returns the namespaces that must be regenerated when the pom is
+        modified. In addition to the namespaces of the affected packets, this
+        includes the namespaces of the parents of the pom's packets (they list
+        their sub-packets) and the namespaces using the pom's enums. '''
+    namespaces = [pom.namespace]
+    for packet in self.affected_packets(pom):
+      namespaces.append(packet.pom.namespace)
+
+    for packet in pom.packets.values():
+      if packet.parent:
+        namespaces.append(packet.parent.pom.namespace)
+
+    for user in self.__enum_users.get(pom.namespace, []):
+      namespaces.append(user.namespace)
+
+    return [ns for ns in self.poms if ns in namespaces]
+
+  def __closure(self, node, neighbors, recursive):  # pylint: disable=R0201
+    ''' Returns the neighbors of the node, and their neighbors if recursive. '''
+    result = []
+    pending = list(neighbors(node))
+    while pending:
+      neighbor = pending.pop(0)
+      if neighbor in result:
+        continue
+
+      result.append(neighbor)
+      if recursive:
+        pending += neighbors(neighbor)
+    return result
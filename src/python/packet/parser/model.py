@@ -56,6 +56,8 @@ def parse_file(file_path):
   file_name = os.path.basename(file_path)
   name, ext = os.path.splitext(file_name)  # pylint: disable=W0612
   pom = parse_stream(ANTLRFileStream(qualified_path, 'UTF8'), name)
+  if pom:
+    pom.file_path = file_path
   __PARSED_PACKETS[file_path] = pom
   return pom
 
@@ -123,6 +125,8 @@ class PacketObjectModel(object):  # pylint: disable=R0903
     ''' @param parsed_tree: The parsed model for the packet. '''
     self._tree = _PythonicWrapper(parsed_tree)
     self.namespace = namespace
+    # The packet file this model is parsed from (None for parsed strings).
+    self.file_path = None
     self.package_dict = self.__get_package_dict(self._tree)
     self.includes = OrderedDict()
     self.enums = OrderedDict()
@@ -269,6 +273,8 @@ class EnumItem(object):  # pylint: disable=R0903
         @param enum_item: The parsed enum item structure. '''
     self.enum = enum
     self.name = enum_item.values[0]
+    # Enum items referenced in the value expression.
+    self.references = []
     self.value = self.__evaluate_value(enum_item.children[1])
 
   def __evaluate_value(self, enum_item):
@@ -280,6 +286,7 @@ class EnumItem(object):  # pylint: disable=R0903
       item = self.enum.pom.find_enum_item(enum_item)
       assert item, \
           'Enum not found in value of %s' % self.name
+      self.references.append(item)
       return item.value
 
     children_values = [self.__evaluate_value(child)
@@ -487,12 +494,14 @@ class AnnotationParam(object):  # pylint: disable=R0903
   def __init__(self, annotation, param):
     self.annotation = annotation
     self.name = param.values[0]
+    self.enum_item = None
     if len(param.values) == 1:
       self.value = None
       return
 
     if param.enum_ref_list:
       item = self.annotation.packet.pom.find_enum_item(param.enum_ref_list[0])
+      self.enum_item = item
       self.value = item.value if item else None
       return
 
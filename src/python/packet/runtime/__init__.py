@@ -0,0 +1,208 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' The runtime utilities for generated Python packets. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import array
+
+try:
+  import numpy  # pylint: disable=F0401
+except ImportError:
+  numpy = None  # pylint: disable=C0103
+
+class Packet(object):
+  ''' The parent of all generated packets. A packet is a view over a buffer,
+      and never copies the buffer it is created with. Setters write into the
+      buffer, and require it to be writable (e.g., a bytearray). '''
+  __slots__ = ('buf', 'batched')
+
+  # The numpy dtype of constant-size packets. None for other packets, or when
+  # numpy is not installed.
+  DTYPE = None
+
+  def __init__(self, buf, batched=False):
+    ''' @param buf: The underlying buffer, or a memoryview of it.
+        @param batched: Whether the packet is a slice of a buffer shared with
+                        other packets, as written by write_into. '''
+    self.buf = buf if isinstance(buf, memoryview) else memoryview(buf)
+    self.batched = batched
+
+  @classmethod
+  def frombuffer(cls, buf, count=-1, offset=0):
+    ''' Decodes consecutive packets in the buffer as a numpy record array,
+        without copying the buffer.
+        @param buf: The buffer.
+        @param count: The number of packets to read, -1 reads all.
+        @param offset: The offset of the first packet in the buffer. '''
+    if cls.DTYPE is None:
+      raise TypeError('%s has no numpy dtype' % cls.__name__)
+
+    return numpy.frombuffer(buf, dtype=cls.DTYPE, count=count, offset=offset)
+
+  @classmethod
+  def encoded_size(cls, values):
+    ''' Returns the size of the packet written by write_into for the values.
+        It is overriden by the packets that are not padded nor custom sized.
+    '''
+    raise TypeError('%s cannot be encoded from values' % cls.__name__)
+
+  @classmethod
+  def write_into(cls, buf, offset, values, size=None):
+    ''' Writes the packet with the values into the buffer at the offset. It is
+        overriden by the packets that are not padded nor custom sized. '''
+    raise TypeError('%s cannot be encoded from values' % cls.__name__)
+
+  @classmethod
+  def new_batch(cls, values):
+    ''' Returns new packets with each of the values laid out back-to-back in
+        one buffer of the exact total size, and a memoryview of the whole
+        buffer. The packets are views of the buffer, and the setters that grow
+        a packet (e.g., add_x) raise a ValueError.
+        @param values: The values of the packets, as passed to write_into. '''
+    return _write_batch([(cls, vals) for vals in values])
+
+  def size(self):
+    ''' Returns the size of this packet. It is always overriden by the real
+        packets. '''
+    return len(self.buf)
+
+  def buffer(self):
+    ''' Returns the bytes of this packet as a view over the buffer. '''
+    return self.buf[:self.size()]
+
+  def open_gap(self, offset, size, packet_size):
+    ''' Opens a space of size bytes in the packet buffer at the offset.
+        packet_size is actual size of the packet (not the length of the
+        underlying buffer) and must be passed to the function. If the buffer
+        is too small or read-only, the packet is moved to a new bytearray and
+        does not share its buffer with other views anymore. Batched packets
+        are never moved, and a ValueError is raised instead. '''
+    if packet_size < offset:
+      raise ValueError('Offset (%d) is larger than the size (%d)' %
+                       (offset, packet_size))
+
+    if self.buf.readonly or len(self.buf) < packet_size + size:
+      if self.batched:
+        raise ValueError('Cannot grow a batched packet by %d bytes' % size)
+      buf = bytearray(max(len(self.buf), (packet_size + size) * 2))
+      buf[:packet_size] = self.buf[:packet_size].tobytes()
+      self.buf = memoryview(buf)
+
+    if packet_size == offset:
+      return
+
+    self.buf[offset + size:packet_size + size] = \
+        self.buf[offset:packet_size].tobytes()
+
+def padded_size(size, multiple, constant):
+  ''' Returns the size padded to the given multiple. '''
+  if multiple == 0:
+    return size + constant
+
+  return ((size + multiple - 1) // multiple) * multiple + constant
+
+def dtype(fields, itemsize):
+  ''' Returns the numpy dtype of a constant-size packet, or None if numpy is not
+      installed.
+      @param fields: List of (name, format, offset) tuples.
+      @param itemsize: The size of the packet. '''
+  if numpy is None:
+    return None
+
+  return numpy.dtype({
+      'names': [name for name, _, _ in fields],
+      'formats': [fmt for _, fmt, _ in fields],
+      'offsets': [offset for _, _, offset in fields],
+      'itemsize': itemsize,
+      })
+
+def iter_packets(packet_class, buf, offset=0, end=None):
+  ''' Yields (offset, packet) for the complete back-to-back packets in the
+      buffer, where each packet is a view of exactly its own bytes. Stops at
+      the first incomplete packet.
+      @param packet_class: The generated class of the packets.
+      @param buf: The buffer, or a memoryview of it.
+      @param offset: The offset of the first packet.
+      @param end: The end of the data in the buffer. '''
+  view = buf if isinstance(buf, memoryview) else memoryview(buf)
+  end = len(view) if end is None else end
+  min_size = max(packet_class.MIN_SIZE, 1)
+  while end - offset >= min_size:
+    size = packet_class(view[offset:end]).size()
+    if size < min_size:
+      raise ValueError('Invalid packet size %d at offset %d' % (size, offset))
+    if offset + size > end:
+      return
+    yield offset, packet_class(view[offset:offset + size])
+    offset += size
+
+def iter_frames(buf, frame_size, header_size, offset=0, end=None):
+  ''' Yields (offset, size) of the complete frames in the buffer. Stops at the
+      first incomplete frame. Raises ValueError for a frame smaller than the
+      header.
+      @param frame_size: The function returned by compile_frame_size.
+      @param header_size: The header size returned by compile_frame_size. '''
+  end = len(buf) if end is None else end
+  min_size = max(header_size, 1)
+  while end - offset >= min_size:
+    size = frame_size(buf, offset)
+    if size < min_size:
+      raise ValueError('Invalid frame size %d at offset %d' % (size, offset))
+    if offset + size > end:
+      return
+    yield offset, size
+    offset += size
+
+def check_values(packet_class, values):
+  ''' Raises ValueError if a key of the values is not one of the
+      ENCODER_FIELDS of the packet class. '''
+  unknown = set(values).difference(packet_class.ENCODER_FIELDS)
+  if unknown:
+    raise ValueError('%s cannot be encoded with %s' %
+                     (packet_class.__name__, ', '.join(sorted(unknown))))
+
+def _write_batch(messages):
+  ''' Writes the messages back-to-back into a new buffer of the exact total
+      size, and returns the packets and a memoryview of the buffer. '''
+  sizes = [cls.encoded_size(values) for cls, values in messages]
+  view = memoryview(bytearray(sum(sizes)))
+  packets = []
+  offset = 0
+  for (cls, values), size in zip(messages, sizes):
+    packets.append(cls.write_into(view, offset, values, size))
+    offset += size
+  return packets, view
+
+def encode(messages):
+  ''' Encodes the messages back-to-back into a single buffer, and returns a
+      memoryview of the buffer that can be passed to socket.sendall or
+      file.write. The buffer is allocated once with the total encoded_size of
+      the messages, and each message is written in place by write_into.
+      @param messages: List of (packet_class, values) tuples. '''
+  return _write_batch(messages)[1]
+
+def array_typecode(fmt):
+  ''' Returns the array typecode for a struct format character. Python 2 does
+      not support 'q' in arrays, and we fall back to longs of the same size. '''
+  try:
+    array.array(fmt)
+    return fmt
+  except ValueError:
+    return 'l' if fmt == 'q' else 'L'
@@ -0,0 +1,241 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' asyncio adapters for generated Python packets. Requires Python 3.7. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+from abc import ABCMeta
+from abc import abstractmethod
+import asyncio
+
+from packet.runtime import iter_packets
+
+DEFAULT_BUF_SIZE = 1 << 16
+DEFAULT_HIGH_WATER = 1 << 16
+DEFAULT_LOW_WATER = 1 << 14
+
+class Framer(object):
+  ''' Splits a byte stream into packets using a reusable buffer. The packets
+      returned by frames() are views over the buffer, and are only valid until
+      the buffer is refilled. Copy a packet (e.g., pkt.buffer().tobytes()) to
+      keep it. '''
+  def __init__(self, packet_class, buf_size=DEFAULT_BUF_SIZE):
+    ''' @param packet_class: The generated class of the packets.
+        @param buf_size: The initial size of the buffer. '''
+    self.packet_class = packet_class
+    self._buf = bytearray(buf_size)
+    self._view = memoryview(self._buf)
+    self._start = 0
+    self._end = 0
+
+  def pending(self):
+    ''' Returns the number of buffered bytes of incomplete packets. '''
+    return self._end - self._start
+
+  def get_buffer(self, size_hint):
+    ''' Returns a writable view of at least size_hint bytes at the end of the
+        buffer, compacting or growing the buffer if needed. The buffer never
+        resizes in place, so previous views are never invalidated by a
+        BufferError. '''
+    pending = self.pending()
+    if self._end + size_hint > len(self._buf):
+      if pending + size_hint > len(self._buf):
+        buf = bytearray(max(2 * len(self._buf), pending + size_hint))
+        buf[:pending] = self._view[self._start:self._end]
+        self._buf = buf
+        self._view = memoryview(buf)
+      elif pending:
+        self._view[:pending] = self._view[self._start:self._end].tobytes()
+      self._start = 0
+      self._end = pending
+    return self._view[self._end:]
+
+  def buffer_updated(self, nbytes):
+    ''' Marks nbytes written into the view returned by get_buffer. '''
+    self._end += nbytes
+
+  def feed(self, data):
+    ''' Copies data into the buffer. '''
+    size = len(data)
+    self.get_buffer(size)[:size] = data
+    self.buffer_updated(size)
+
+  def frames(self):
+    ''' Returns the complete packets in the buffer as views. '''
+    packets = []
+    offset = self._start
+    for offset, packet in iter_packets(self.packet_class, self._view,
+                                       self._start, self._end):
+      packets.append(packet)
+    if packets:
+      self._start = offset + len(packets[-1].buf)
+    if self._start == self._end:
+      self._start = self._end = 0
+    return packets
+
+class PacketProtocol(asyncio.BufferedProtocol, metaclass=ABCMeta):
+  ''' An asyncio protocol that delivers the packets received in each read as a
+      batch of zero-copy views, and coalesces the packets sent in the same
+      iteration of the event loop into one write. Writes are paused between
+      the high and low watermarks of the transport. '''
+
+  # The generated class of the packets. Set by the generated subclasses.
+  packet_class = None
+
+  def __init__(self, buf_size=DEFAULT_BUF_SIZE, high_water=DEFAULT_HIGH_WATER,
+               low_water=DEFAULT_LOW_WATER):
+    self.transport = None
+    self._loop = None
+    self.framer = Framer(self.packet_class, buf_size)
+    self.high_water = high_water
+    self.low_water = low_water
+    self._wbuf = bytearray()
+    self._flush_handle = None
+    self._paused = False
+    self._drain_waiters = []
+
+  def connection_made(self, transport):
+    self.transport = transport
+    self._loop = asyncio.get_running_loop()
+    transport.set_write_buffer_limits(high=self.high_water,
+                                      low=self.low_water)
+
+  def connection_lost(self, exc):
+    self._wake_drain_waiters(exc or ConnectionResetError('Connection lost'))
+
+  def get_buffer(self, sizehint):
+    return self.framer.get_buffer(max(sizehint, 1))
+
+  def buffer_updated(self, nbytes):
+    self.framer.buffer_updated(nbytes)
+    packets = self.framer.frames()
+    if packets:
+      self.packets_received(packets)
+
+  @abstractmethod
+  def packets_received(self, packets):
+    ''' Called with the packets of each read. The packets are only valid
+        during the call. '''
+
+  def send(self, packet):
+    ''' Queues the packet. Packets queued in the same iteration of the event
+        loop are written to the transport together. '''
+    self._wbuf += packet.buffer()
+    if self._flush_handle is None:
+      self._flush_handle = self._loop.call_soon(self.flush)
+
+  def flush(self):
+    ''' Writes the queued packets. '''
+    self._flush_handle = None
+    if self._wbuf and self.transport and not self.transport.is_closing():
+      self.transport.write(bytes(self._wbuf))
+    del self._wbuf[:]
+
+  def pause_writing(self):
+    self._paused = True
+
+  def resume_writing(self):
+    self._paused = False
+    self._wake_drain_waiters(None)
+
+  def _wake_drain_waiters(self, exc):
+    for waiter in self._drain_waiters:
+      if not waiter.done():
+        if exc:
+          waiter.set_exception(exc)
+        else:
+          waiter.set_result(None)
+    self._drain_waiters = []
+
+  async def drain(self):
+    ''' Waits until the transport is below its low watermark. '''
+    self.flush()
+    if not self._paused:
+      return
+    waiter = self._loop.create_future()
+    self._drain_waiters.append(waiter)
+    await waiter
+
+class PacketReader(object):
+  ''' Reads batches of packets from an asyncio.StreamReader. '''
+
+  # The generated class of the packets. Set by the generated subclasses.
+  packet_class = None
+
+  def __init__(self, reader, buf_size=DEFAULT_BUF_SIZE):
+    ''' @param reader: The asyncio.StreamReader.
+        @param buf_size: The number of bytes read at once. '''
+    self.reader = reader
+    self.buf_size = buf_size
+    self.framer = Framer(self.packet_class, buf_size)
+
+  async def read_packets(self):
+    ''' Returns the next batch of packets, as views that are valid until the
+        next call. Returns an empty list at the end of the stream. Raises
+        asyncio.IncompleteReadError if the stream ends with a partial packet.
+    '''
+    while True:
+      data = await self.reader.read(self.buf_size)
+      if not data:
+        if self.framer.pending():
+          raise asyncio.IncompleteReadError(b'', None)
+        return []
+
+      self.framer.feed(data)
+      packets = self.framer.frames()
+      if packets:
+        return packets
+
+  def __aiter__(self):
+    return self
+
+  async def __anext__(self):
+    packets = await self.read_packets()
+    if not packets:
+      raise StopAsyncIteration()
+    return packets
+
+class PacketWriter(object):
+  ''' Coalesces packets written to an asyncio.StreamWriter. '''
+  def __init__(self, writer, high_water=DEFAULT_HIGH_WATER):
+    ''' @param writer: The asyncio.StreamWriter.
+        @param high_water: The number of queued bytes that triggers a write.
+    '''
+    self.writer = writer
+    self.high_water = high_water
+    self._wbuf = bytearray()
+
+  def write(self, packet):
+    ''' Queues the packet, and writes the queue once it reaches the high
+        watermark. '''
+    self._wbuf += packet.buffer()
+    if len(self._wbuf) >= self.high_water:
+      self.flush()
+
+  def flush(self):
+    ''' Writes the queued packets. '''
+    if self._wbuf:
+      self.writer.write(bytes(self._wbuf))
+      del self._wbuf[:]
+
+  async def drain(self):
+    ''' Writes the queued packets and waits for the transport's backpressure.
+    '''
+    self.flush()
+    await self.writer.drain()
@@ -0,0 +1,230 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Memory-mapped scanner for capture files of back-to-back packets. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import array
+import logging
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from packet.runtime import array_typecode
+from packet.runtime import iter_frames
+from packet.runtime import iter_packets
+
+LOG = logging.getLogger('packet.runtime.capture')
+
+INDEX_SUFFIX = '.idx'
+
+# The header of index files: magic, size, modification time and checksum of
+# the capture file, and the number of offsets that follow the header as
+# little-endian uint64s.
+_INDEX_MAGIC = b'PKTIDX02'
+_INDEX_HEADER = struct.Struct('<8sQdIQ')
+
+# The number of bytes at each end of the capture file covered by the checksum.
+_CHECKSUM_SIZE = 1 << 12
+
+def _memoryview(mapped):
+  ''' Returns a memoryview of the mmap. '''
+  try:
+    return memoryview(mapped)
+  except TypeError:
+    # Python 2 mmaps only support the old buffer protocol.
+    return memoryview(buffer(mapped))  # pylint: disable=E0602
+
+def get_frame_size(packet_class):
+  ''' Returns a function of (buf, offset) that returns the size of the packet
+      of the class at the offset of the buffer. The function reads only the
+      size field with the frame_size of generated and compiled classes, and
+      creates a view of the packet for other classes. '''
+  frame_size = getattr(packet_class, 'frame_size', None)
+  if frame_size:
+    return frame_size
+  return lambda buf, offset: packet_class(buf[offset:]).size()
+
+class CaptureFile(object):
+  ''' A capture file of back-to-back packets. The file is memory-mapped, and
+      the packets are read-only views of the mapping. Views must not be used
+      after the capture file is closed. '''
+  def __init__(self, path, packet_class):
+    ''' @param path: The path of the capture file.
+        @param packet_class: The generated class of the packets. '''
+    self.path = path
+    self.packet_class = packet_class
+    self._file = open(path, 'rb')
+    stat = os.fstat(self._file.fileno())
+    self.size = stat.st_size
+    self.mtime = stat.st_mtime
+    self._mmap = None
+    self._view = memoryview(b'')
+    if self.size:
+      self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+      self._view = _memoryview(self._mmap)
+    self._offsets = None
+    self._checksum = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+  def close(self):
+    ''' Unmaps and closes the capture file. '''
+    self._view = None
+    self._offsets = None
+    if self._mmap:
+      try:
+        self._mmap.close()
+      except BufferError:
+        LOG.warn('Packets of %s are still referenced, the file is unmapped '
+                 'once they are released', self.path)
+      self._mmap = None
+    self._file.close()
+
+  def scan(self, offset=0, end=None):
+    ''' Yields (offset, packet) for the packets in the file, starting at the
+        offset. A truncated packet at the end is skipped.
+        @param end: The offset to stop at. Defaults to the end of the file. '''
+    end = self.size if end is None else end
+    last = offset
+    for offset, packet in iter_packets(self.packet_class, self._view, offset,
+                                       end):
+      yield offset, packet
+      last = offset + len(packet.buf)
+
+    if last != end:
+      LOG.warn('%s has a truncated packet at %d', self.path, last)
+
+  def __iter__(self):
+    for _, packet in self.scan():
+      yield packet
+
+  def checksum(self):
+    ''' Returns the CRC-32 of the first and the last bytes of the file, which
+        tells apart captures rewritten with the same size and modification
+        time. '''
+    if self._checksum is None:
+      head = self._view[:_CHECKSUM_SIZE].tobytes()
+      tail = self._view[max(self.size - _CHECKSUM_SIZE, 0):].tobytes()
+      self._checksum = zlib.crc32(tail, zlib.crc32(head)) & 0xffffffff
+    return self._checksum
+
+  def scan_offsets(self, offset=0, end=None):
+    ''' Returns the offsets of the packets in the file, starting at the
+        offset. Only the size fields of the packets are read. A truncated
+        packet at the end is skipped.
+        @param end: The offset to stop at. Defaults to the end of the file. '''
+    end = self.size if end is None else end
+    frame_size = get_frame_size(self.packet_class)
+    offsets = array.array(array_typecode('Q'))
+    last = offset
+    for offset, size in iter_frames(self._view, frame_size,
+                                    max(self.packet_class.MIN_SIZE, 1),
+                                    offset, end):
+      offsets.append(offset)
+      last = offset + size
+
+    if last != end:
+      LOG.warn('%s has a truncated packet at %d', self.path, last)
+    return offsets
+
+  def get_index_path(self, index_path=None):  # pylint: disable=R0201
+    ''' Returns the path of the index file. '''
+    return index_path if index_path else self.path + INDEX_SUFFIX
+
+  def build_index(self, index_path=None):
+    ''' Scans the file, writes the offsets of its packets into the index file,
+        and returns the offsets. Failing to write the index file is logged,
+        and the offsets are still returned. '''
+    offsets = self.scan_offsets()
+    self._offsets = offsets
+    path = self.get_index_path(index_path)
+    try:
+      self._write_index(path, offsets)
+    except (IOError, OSError) as err:
+      LOG.warn('Cannot write the index %s: %s', path, err)
+    return offsets
+
+  def _write_index(self, path, offsets):
+    ''' Writes the offsets into the index file. '''
+    index_file = open(path, 'wb')
+    try:
+      index_file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, self.size, self.mtime,
+                                          self.checksum(), len(offsets)))
+      if sys.byteorder == 'big':
+        offsets.byteswap()
+      offsets.tofile(index_file)
+    finally:
+      if sys.byteorder == 'big':
+        offsets.byteswap()
+      index_file.close()
+
+  def load_index(self, index_path=None):
+    ''' Loads the offsets from the index file. Returns None if the index file
+        does not exist or was built for a different capture file. '''
+    path = self.get_index_path(index_path)
+    if not os.path.exists(path):
+      return None
+
+    index_file = open(path, 'rb')
+    try:
+      header = index_file.read(_INDEX_HEADER.size)
+      if len(header) != _INDEX_HEADER.size:
+        return None
+
+      magic, size, mtime, checksum, count = _INDEX_HEADER.unpack(header)
+      if magic != _INDEX_MAGIC or (size, mtime, checksum) != \
+          (self.size, self.mtime, self.checksum()):
+        LOG.info('Ignoring stale index %s', path)
+        return None
+
+      offsets = array.array(array_typecode('Q'))
+      offsets.fromfile(index_file, count)
+      if sys.byteorder == 'big':
+        offsets.byteswap()
+    except EOFError:
+      return None
+    finally:
+      index_file.close()
+
+    self._offsets = offsets
+    return offsets
+
+  def index(self, index_path=None):
+    ''' Returns the offsets of the packets, loading them from the index file
+        or building the index file if needed. '''
+    if self._offsets is None:
+      if self.load_index(index_path) is None:
+        self.build_index(index_path)
+    return self._offsets
+
+  def __len__(self):
+    return len(self.index())
+
+  def __getitem__(self, i):
+    ''' Returns the i'th packet of the file using the index. '''
+    offset = self.index()[i]
+    packet = self.packet_class(self._view[offset:])
+    return self.packet_class(self._view[offset:offset + packet.size()])
@@ -0,0 +1,179 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Columnar batch decoder for streams of framed packets. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import array
+import struct
+
+from packet.generator.base import get_chain_fields
+from packet.generator.python import BUILTIN_TYPES
+from packet.generator.python import get_endian
+from packet.runtime import array_typecode
+from packet.runtime import iter_frames
+from packet.runtime.schema import compile_frame_size
+from packet.runtime.schema import compile_selector
+from packet.runtime.schema import fixed_builtin_fields
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+def _get_subtypes(packet):
+  ''' Returns the packet and all its subtypes. '''
+  packets = [packet]
+  for child in packet.children:
+    packets += _get_subtypes(child)
+  return packets
+
+def _check_fields(packet, names):
+  ''' Raises ValueError if a name is not a field of the packet or its
+      subtypes, or if such a field is not a builtin field at a constant
+      offset. '''
+  found = set()
+  for pkt in _get_subtypes(packet):
+    fixed = set(f for f, _ in fixed_builtin_fields(pkt))
+    for field in get_chain_fields(pkt):
+      if field.name not in names:
+        continue
+      if field not in fixed:
+        raise ValueError('%s.%s is not a builtin field at a constant offset '
+                         'of %s' % (field.packet.name, field.name, pkt.name))
+      found.add(field.name)
+
+  missing = [name for name in names if name not in found]
+  if missing:
+    raise ValueError('%s and its subtypes have no field named %s' %
+                     (packet.name, ', '.join(missing)))
+
+class ColumnBatch(object):  # pylint: disable=R0903
+  ''' The fields of a batch of frames decoded into columns. Frames are grouped
+      by their subtype. Columns are typed arrays, and numpy.frombuffer can
+      convert them without copying. '''
+  def __init__(self, offset):
+    ''' @param offset: The offset of the batch in the stream. '''
+    self.offset = offset
+    self.count = 0
+    # Type name to the stream offsets of its frames.
+    self.offsets = {}
+    # Type name to field name to the typed array of values.
+    self.columns = {}
+
+class ColumnarDecoder(object):
+  ''' Decodes a stream of back-to-back packets into columns of fixed-offset
+      fields. The decoder reads the stream in chunks and never holds more than
+      a chunk and an incomplete frame in memory. '''
+  def __init__(self, packet, fields=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    ''' @param packet: The packet at the root of the stream. Its pom must be
+                       prepared by packet.runtime.schema.prepare.
+        @param fields: Names of the fields to decode. None decodes all builtin
+                       fields at constant offsets. A subtype is decoded into
+                       the columns of the requested fields it has. Raises
+                       ValueError if a requested field is not a builtin field
+                       at a constant offset of the packet or its subtypes.
+        @param chunk_size: The number of bytes read from the stream at once.
+    '''
+    self.packet = packet
+    self.chunk_size = chunk_size
+    self.frame_size, self.header_size = compile_frame_size(packet)
+    self.select = compile_selector(packet)
+    self._plans = {}
+    self._fields = fields
+    if fields is not None:
+      _check_fields(packet, fields)
+
+  def _get_plan(self, packet):
+    ''' Returns the names and the array typecodes of the requested fields of
+        the packet, a list of (unpack_from, indices) that unpack the fields of
+        each byte order into the columns at the indices, and the end of the
+        last requested field. '''
+    plan = self._plans.get(packet)
+    if plan:
+      return plan
+
+    names = []
+    typecodes = []
+    formats = {}
+    for field, offset in fixed_builtin_fields(packet):
+      if self._fields is not None and field.name not in self._fields:
+        continue
+
+      endian = get_endian(field.packet)
+      fmt, position, indices = formats.get(endian, (endian, 0, []))
+      if offset > position:
+        fmt += '%dx' % (offset - position)
+      fmt += BUILTIN_TYPES[field.type.name]
+      indices.append(len(names))
+      formats[endian] = (fmt, offset + field.get_const_size(), indices)
+      names.append(field.name)
+      typecodes.append(array_typecode(BUILTIN_TYPES[field.type.name]))
+
+    unpacks = [(struct.Struct(fmt).unpack_from, indices)
+               for fmt, _, indices in formats.values()]
+    fixed_end = max([position for _, position, _ in formats.values()] + [0])
+    plan = (names, typecodes, unpacks, fixed_end)
+    self._plans[packet] = plan
+    return plan
+
+  def decode_buffer(self, buf, base=0):
+    ''' Decodes the complete frames in the buffer, and returns the batch and
+        the number of bytes consumed.
+        @param base: The offset of the buffer in the stream. '''
+    batch = ColumnBatch(base)
+    end = 0
+    columns = {}
+    for offset, size in iter_frames(buf, self.frame_size, self.header_size):
+      packet = self.select(buf, offset)
+      names, typecodes, unpacks, fixed_end = self._get_plan(packet)
+      if size < fixed_end:
+        raise ValueError('Frame of %s at offset %d is %d bytes, shorter than '
+                         'its fields' % (packet.name, base + offset, size))
+      cols = columns.get(packet)
+      if cols is None:
+        cols = [array.array(t) for t in typecodes]
+        columns[packet] = cols
+        batch.columns[packet.name] = dict(zip(names, cols))
+        batch.offsets[packet.name] = array.array(array_typecode('Q'))
+
+      for unpack_from, indices in unpacks:
+        for i, value in zip(indices, unpack_from(buf, offset)):
+          cols[i].append(value)
+      batch.offsets[packet.name].append(base + offset)
+      batch.count += 1
+      end = offset + size
+    return batch, end
+
+  def decode(self, stream):
+    ''' Yields a batch of columns for every chunk read from the stream.
+        @param stream: A file-like object opened in binary mode. '''
+    buf = bytearray()
+    base = 0
+    while True:
+      data = stream.read(self.chunk_size)
+      buf += data
+      batch, consumed = self.decode_buffer(buf, base)
+      if batch.count:
+        yield batch
+
+      del buf[:consumed]
+      base += consumed
+      if not data:
+        break
+
+    if buf:
+      raise ValueError('Truncated frame at offset %d' % base)
@@ -0,0 +1,388 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Decodes packets directly from a packet object model. The decoder compiles
+    every packet into a class with the same read-only API as the generated
+    Python code (get_x, x_offset, x_size, size, matches, and cast), built from
+    closures over precompiled structs. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import hashlib
+import struct
+
+from packet.generator.base import get_chain_fields
+from packet.generator.python import BUILTIN_TYPES
+from packet.generator.python import get_endian
+from packet.runtime import Packet
+from packet.runtime import iter_packets
+from packet.runtime import padded_size
+from packet.runtime.schema import compile_frame_size
+from packet.runtime.schema import compile_selector
+from packet.runtime.schema import prepare
+from packet.types import BuiltInType
+
+# Schema hashes to compiled schemas.
+_SCHEMAS = {}
+
+def _all_packets(pom, visited=None):
+  ''' Returns the packets of the pom and its includes, parents first. '''
+  visited = set() if visited is None else visited
+  if pom in visited:
+    return []
+
+  visited.add(pom)
+  packets = []
+  for include in pom.includes.values():
+    packets += _all_packets(include, visited)
+  packets += pom.packets.values()
+  return packets
+
+def _describe_packet(packet):
+  ''' Returns a canonical description of the wire format of the packet. '''
+  padding = packet.get_padding_info()
+  fields = []
+  for field in packet.fields:
+    info = field.repeated_info
+    fields.append((field.name, field.type.name,
+                   getattr(field.type, 'pom', None) and field.type.pom.namespace,
+                   info and (info.size_field and info.size_field.name,
+                             info.count_field and info.count_field.name,
+                             info.count)))
+  return (packet.pom.namespace, packet.name,
+          packet.parent and (packet.parent.pom.namespace, packet.parent.name),
+          packet.big_endian, packet.size_info[0],
+          packet.get_size_field() and packet.get_size_field().name,
+          padding and (padding.multiple, padding.constant, padding.excluded),
+          [(f.name, v) for f, v in packet.get_type_selector_condition()],
+          fields)
+
+def schema_hash(pom):
+  ''' Returns the hash of the wire format of the pom and its includes. The pom
+      must be prepared. '''
+  description = [_describe_packet(p) for p in _all_packets(pom)]
+  return hashlib.sha1(repr(description).encode('utf-8')).hexdigest()
+
+def compile_schema(pom):
+  ''' Prepares the pom and returns its compiled schema. Schemas are cached by
+      their hash, and are compiled once. '''
+  prepare(pom)
+  key = schema_hash(pom)
+  schema = _SCHEMAS.get(key)
+  if not schema:
+    schema = Schema(pom)
+    _SCHEMAS[key] = schema
+  return schema
+
+class Schema(object):
+  ''' The packet classes compiled from a packet object model. '''
+  def __init__(self, pom):
+    ''' @param pom: The prepared packet object model. '''
+    self.pom = pom
+    self.classes = {}
+    self._models = {}
+    self._selectors = {}
+    packets = _all_packets(pom)
+    for packet in packets:
+      self._make_class(packet)
+    for packet in packets:
+      _Compiler(packet, self._models).compile()
+
+  def _make_class(self, packet):
+    ''' Creates the empty class of the packet. '''
+    if packet in self._models:
+      return self._models[packet]
+
+    base = self._make_class(packet.parent) if packet.parent else Packet
+    cls = type(str(packet.name), (base,), {
+        '__slots__': (),
+        'MIN_SIZE': packet.min_size,
+        'model': packet,
+        })
+    self._models[packet] = cls
+    self.classes['%s.%s' % (packet.pom.namespace, packet.name)] = cls
+    if packet.pom == self.pom:
+      self.classes[packet.name] = cls
+    return cls
+
+  def __getitem__(self, name):
+    ''' Returns the class of the packet.
+        @param name: The packet name, qualified with its namespace for the
+                     packets of included files. '''
+    return self.classes[name]
+
+  def select(self, name, buf, offset=0):
+    ''' Returns the class of the most specific subtype of the packet at the
+        offset of the buffer. '''
+    selector = self._selectors.get(name)
+    if not selector:
+      selector = compile_selector(self.classes[name].model)
+      self._selectors[name] = selector
+    return self._models[selector(buf, offset)]
+
+  def decode(self, name, buf, offset=0):
+    ''' Returns the packet at the offset of the buffer as its most specific
+        subtype. '''
+    view = buf if isinstance(buf, memoryview) else memoryview(buf)
+    return self.select(name, view, offset)(view[offset:])
+
+  def iter_packets(self, name, buf, offset=0):
+    ''' Yields (offset, packet) for the back-to-back packets in the buffer,
+        as their most specific subtypes. '''
+    select = self.select
+    for offset, packet in iter_packets(self.classes[name], buf, offset):
+      yield offset, select(name, packet.buf)(packet.buf)
+
+def _method(cls, name):
+  ''' Returns the function of a method of the class or its parents. Unlike
+      getattr, it returns the plain function in Python 2 as well, which can be
+      called with the instances of any packet class. '''
+  for klass in cls.__mro__:
+    if name in klass.__dict__:
+      return klass.__dict__[name]
+  raise AttributeError(name)
+
+def _unpacker(field):
+  ''' Returns the unpack_from of the field's element. '''
+  return struct.Struct(get_endian(field.packet) +
+                       BUILTIN_TYPES[field.type.name]).unpack_from
+
+class _Compiler(object):  # pylint: disable=R0903
+  ''' Compiles the methods of a packet class. '''
+  def __init__(self, packet, models):
+    self.packet = packet
+    self.models = models
+    self.cls = models[packet]
+
+  def compile(self):
+    ''' Adds the methods to the class. '''
+    packet = self.packet
+    cls = self.cls
+    const, intermediates = self._parent_offset()
+    for field in packet.fields:
+      offset = self._compile_offset(field, const, list(intermediates))
+      setattr(cls, field.name + '_offset', offset)
+      if not field.get_const_size():
+        setattr(cls, field.name + '_size',
+                self._compile_field_size(field, offset))
+      setattr(cls, 'get_' + field.name,
+              self._compile_getter(field, const, offset, not intermediates))
+      if field.get_const_size():
+        const += field.get_const_size()
+      else:
+        intermediates.append(field)
+
+    if not packet.is_custom_sized():
+      cls.size = self._compile_size()
+      try:
+        cls.frame_size = staticmethod(compile_frame_size(packet)[0])
+      except ValueError:
+        # The size field does not have a constant offset.
+        pass
+
+    conditions = [(_method(cls, 'get_' + f.name), v)
+                  for f, v in packet.get_type_selector_condition(True)]
+    def matches(_, pkt):
+      ''' Whether the packet can be converted to this packet. '''
+      for getter, value in conditions:
+        if getter(pkt) != value:
+          return False
+      return True
+    cls.matches = classmethod(matches)
+
+    def cast(klass, pkt):
+      ''' Converts the packet sharing the same buffer. '''
+      if not klass.matches(pkt):
+        raise ValueError('Cannot convert to %s' % klass.__name__)
+      return klass(pkt.buf)
+    cls.cast = classmethod(cast)
+
+  def _parent_offset(self):
+    ''' Returns the offset after the parents' fields. '''
+    const = 0
+    intermediates = []
+    for field in get_chain_fields(self.packet.parent):
+      if field.get_const_size():
+        const += field.get_const_size()
+      else:
+        intermediates.append(field)
+    return const, intermediates
+
+  def _compile_offset(self, field, const, intermediates):
+    ''' Returns the offset method of the field. Offsets are constant, or a
+        constant plus the sizes of the variable-size fields before the field.
+    '''
+    if not intermediates:
+      return lambda self: const
+
+    sizes = [_method(self.models[f.packet], f.name + '_size')
+             for f in intermediates]
+    if len(sizes) == 1:
+      size = sizes[0]
+      return lambda self: const + size(self)
+
+    def offset(self):
+      ''' Returns the offset of the field. '''
+      res = const
+      for size in sizes:
+        res += size(self)
+      return res
+    return offset
+
+  def _compile_getter(self, field, const, offset, is_const):
+    ''' Returns the getter of the field. '''
+    if isinstance(field.type, BuiltInType):
+      return self._compile_builtin_getter(field, const, offset, is_const)
+    return self._compile_packet_getter(field, const, offset, is_const)
+
+  def _compile_builtin_getter(self, field, const, offset, is_const):
+    ''' Returns the getter of a builtin field. '''
+    if field.is_dynamic_repeated():
+      size = _method(self.cls, field.name + '_size')
+      elem_size = field.type.length_in_bytes
+      if BUILTIN_TYPES[field.type.name] == 'B':
+        def get_bytes(self):
+          ''' Returns the bytes as a view. '''
+          start = offset(self)
+          return self.buf[start:start + size(self)]
+        return get_bytes
+
+      fmt = get_endian(field.packet) + '%d' + BUILTIN_TYPES[field.type.name]
+      def get_array(self):
+        ''' Returns the elements as a tuple. '''
+        return struct.unpack_from(fmt % (size(self) // elem_size), self.buf,
+                                  offset(self))
+      return get_array
+
+    if field.is_repeated():
+      unpack_from = struct.Struct(
+          '%s%d%s' % (get_endian(field.packet), field.get_repeated_count(),
+                      BUILTIN_TYPES[field.type.name])).unpack_from
+      if is_const:
+        return lambda self: unpack_from(self.buf, const)
+      return lambda self: unpack_from(self.buf, offset(self))
+
+    unpack_from = _unpacker(field)
+    if is_const:
+      return lambda self: unpack_from(self.buf, const)[0]
+    return lambda self: unpack_from(self.buf, offset(self))[0]
+
+  def _compile_packet_getter(self, field, const, offset, is_const):
+    ''' Returns the getter of a packet field. '''
+    elem_class = self.models[field.type]
+    if not field.is_repeated():
+      if is_const:
+        return lambda self: elem_class(self.buf[const:])
+      return lambda self: elem_class(self.buf[offset(self):])
+
+    size_getter = self._field_getter(field.get_size_field())
+    count_getter = self._field_getter(field.get_count_field())
+    const_count = field.get_repeated_count()
+    def get_packets(self):
+      ''' Returns the packets as a list of views. '''
+      start = offset(self)
+      packet_size = self.size()
+      size = size_getter(self) if size_getter else packet_size - start
+      if count_getter:
+        count = count_getter(self)
+      else:
+        count = const_count if const_count else packet_size - start
+      res = []
+      while size > 0 and count > 0 and packet_size > start:
+        elem = elem_class(self.buf[start:])
+        elem_size = elem.size()
+        if elem_size == 0 or elem_size > size:
+          break
+        size -= elem_size
+        start += elem_size
+        count -= 1
+        res.append(elem)
+      return res
+    return get_packets
+
+  def _field_getter(self, field):
+    ''' Returns the getter of a field, or None. '''
+    if not field:
+      return None
+    return _method(self.models[field.packet], 'get_' + field.name)
+
+  def _compile_field_size(self, field, offset):
+    ''' Returns the size method of a variable-size field. '''
+    packet = self.packet
+    if not field.is_repeated():
+      elem_class = self.models[field.type]
+      def sub_packet_size(self):
+        ''' Returns the size of the sub-packet. '''
+        start = offset(self)
+        if start >= self.size():
+          return 0
+        return elem_class(self.buf[start:]).size()
+      return sub_packet_size
+
+    if field.get_size_field():
+      return self._field_getter(field.get_size_field())
+
+    if field.has_implicit_size():
+      padding = packet.get_padding_info()
+      if padding and padding.excluded:
+        size_getter = self._field_getter(packet.get_size_field())
+        return lambda self: size_getter(self) - offset(self)
+      return lambda self: self.size() - offset(self)
+
+    count_getter = self._field_getter(field.get_count_field())
+    if isinstance(field.type, BuiltInType):
+      elem_size = field.type.length_in_bytes
+      return lambda self: count_getter(self) * elem_size
+
+    elem_class = self.models[field.type]
+    def counted_size(self):
+      ''' Returns the size of the counted packets. '''
+      start = offset(self)
+      end = start
+      count = count_getter(self)
+      while count > 0:
+        end += elem_class(self.buf[end:]).size()
+        count -= 1
+      return end - start
+    return counted_size
+
+  def _compile_size(self):
+    ''' Returns the size method of the packet. '''
+    packet = self.packet
+    if packet.is_const_size():
+      const_size = packet.get_const_size()
+      return lambda self: const_size
+
+    min_size = packet.min_size
+    size_getter = self._field_getter(packet.get_size_field())
+    padding = packet.get_padding_info()
+    if not padding:
+      def size(self):
+        ''' Returns the size of the packet. '''
+        if len(self.buf) < min_size:
+          return 0
+        return size_getter(self)
+      return size
+
+    multiple, constant = padding.multiple, padding.constant
+    def padded(self):
+      ''' Returns the padded size of the packet. '''
+      if len(self.buf) < min_size:
+        return 0
+      return padded_size(size_getter(self), multiple, constant)
+    return padded
@@ -0,0 +1,132 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Parallel decoding of capture files in a process pool. The file is split
+    into chunks at packet boundaries, and every worker memory-maps the file
+    and decodes its chunks. Only offsets and results cross process
+    boundaries.
+
+    Functions and packet classes are sent to the workers by reference, and
+    must be importable (e.g., module-level functions and generated classes).
+'''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import multiprocessing
+
+from packet.runtime.capture import CaptureFile
+
+# Number of chunks per worker, to balance uneven chunks.
+CHUNKS_PER_PROCESS = 4
+
+# Capture files opened by this worker process, keyed by (path, packet class).
+_CAPTURES = {}
+
+def _get_capture(path, packet_class):
+  ''' Returns the capture file, opened once per process. '''
+  key = (path, packet_class)
+  capture = _CAPTURES.get(key)
+  if capture is None:
+    capture = CaptureFile(path, packet_class)
+    _CAPTURES[key] = capture
+  return capture
+
+def get_chunks(capture, count, index_path=None):
+  ''' Splits the capture file into at most count chunks of about the same
+      number of packets. Returns a list of (start, end) offsets.
+      @param index_path: The offset index of the file, which is loaded or
+                         built if given. Otherwise, the packet boundaries are
+                         scanned by their size fields. '''
+  if index_path:
+    offsets = capture.index(index_path)
+  else:
+    offsets = capture.scan_offsets()
+  if not len(offsets):
+    return []
+
+  step = max(1, (len(offsets) + count - 1) // count)
+  starts = [offsets[i] for i in range(0, len(offsets), step)]
+  return list(zip(starts, starts[1:] + [capture.size]))
+
+def _map_chunk(task):
+  ''' Applies the function to the packets of a chunk, and drops None results.
+  '''
+  path, packet_class, start, end, func = task
+  results = []
+  for _, packet in _get_capture(path, packet_class).scan(start, end):
+    result = func(packet)
+    if result is not None:
+      results.append(result)
+  return results
+
+def _reduce_chunk(task):
+  ''' Folds the packets of a chunk. '''
+  path, packet_class, start, end, func, initial = task
+  acc = initial
+  for _, packet in _get_capture(path, packet_class).scan(start, end):
+    acc = func(acc, packet)
+  return acc
+
+def _run(worker, tasks, processes):
+  ''' Runs the tasks in a process pool, and returns the results in order. '''
+  pool = multiprocessing.Pool(processes)
+  try:
+    return pool.map(worker, tasks, chunksize=1)
+  finally:
+    pool.close()
+    pool.join()
+
+def map_capture(path, packet_class, func, processes=None, index_path=None):
+  ''' Applies func to every packet of the capture file in parallel, and
+      returns the results in the order of the packets. Packets for which func
+      returns None are filtered out.
+      @param func: A function of a packet. The packet is only valid during the
+                   call.
+      @param processes: The number of worker processes. Defaults to the number
+                        of CPUs.
+      @param index_path: The offset index to load, or to build if it is
+                         missing or stale. No index is written by default. '''
+  processes = processes or multiprocessing.cpu_count()
+  with CaptureFile(path, packet_class) as capture:
+    chunks = get_chunks(capture, processes * CHUNKS_PER_PROCESS, index_path)
+
+  tasks = [(path, packet_class, start, end, func) for start, end in chunks]
+  results = []
+  for chunk_results in _run(_map_chunk, tasks, processes):
+    results += chunk_results
+  return results
+
+def reduce_capture(path, packet_class, func, combine, initial,
+                   processes=None, index_path=None):
+  ''' Aggregates the packets of the capture file in parallel. Every worker
+      folds its chunks with func starting from initial, and the partial
+      aggregates are combined in the order of the chunks.
+      @param func: A function of (aggregate, packet) returning the aggregate.
+      @param combine: A function of two aggregates returning their combination.
+      @param initial: The initial aggregate of every chunk. It must be the
+                      identity of combine. '''
+  processes = processes or multiprocessing.cpu_count()
+  with CaptureFile(path, packet_class) as capture:
+    chunks = get_chunks(capture, processes * CHUNKS_PER_PROCESS, index_path)
+
+  tasks = [(path, packet_class, start, end, func, initial)
+           for start, end in chunks]
+  acc = initial
+  for partial in _run(_reduce_chunk, tasks, processes):
+    acc = combine(acc, partial)
+  return acc
@@ -0,0 +1,127 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Layout helpers for decoding packets directly from a packet object model,
+    without generating code. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import struct
+
+from packet.generator.base import get_chain_fields
+from packet.generator.processor import EndianProcessor
+from packet.generator.processor import OffsetProcessor
+from packet.generator.processor import SizeProcessor
+from packet.generator.python import BUILTIN_TYPES
+from packet.generator.python import get_endian
+from packet.runtime import padded_size
+from packet.types import BuiltInType
+
+def prepare(pom):
+  ''' Processes the sizes, the offsets and the byte orders of the pom and its
+      includes, and returns the pom. '''
+  SizeProcessor().process(pom)
+  _process_offsets(pom)
+  EndianProcessor().process(pom)
+  return pom
+
+def _process_offsets(pom):
+  ''' Processes the offsets of the pom and its includes. '''
+  for included_pom in pom.includes.values():
+    _process_offsets(included_pom)
+  OffsetProcessor().process(pom)
+
+def fixed_fields(packet):
+  ''' Returns the fields of the packet (including its parents' fields) that
+      have a constant offset, as a list of (field, offset) tuples. The offsets
+      are the ones computed by the offset processor. '''
+  return [(field, field.offset[0]) for field in get_chain_fields(packet)
+          if not field.offset[1]]
+
+def fixed_builtin_fields(packet):
+  ''' Returns the single-valued builtin fields of the packet at constant
+      offsets, as a list of (field, offset) tuples. '''
+  return [(f, o) for f, o in fixed_fields(packet)
+          if isinstance(f.type, BuiltInType) and not f.is_repeated()]
+
+def field_struct(field):
+  ''' Returns the struct of a single-valued builtin field. '''
+  return struct.Struct(get_endian(field.packet) +
+                       BUILTIN_TYPES[field.type.name])
+
+def _find_fixed_field(packet, field):
+  ''' Returns the constant offset of the field in the packet, or raises
+      ValueError. '''
+  for fixed, offset in fixed_builtin_fields(packet):
+    if fixed == field:
+      return offset
+
+  raise ValueError('%s.%s does not have a constant offset in %s' %
+                   (field.packet.name, field.name, packet.name))
+
+def compile_frame_size(packet):
+  ''' Returns a function of (buf, offset) that returns the size of the packet
+      at the offset of the buffer, and the number of bytes that must be
+      available to call that function. Raises ValueError if the size of the
+      packet cannot be read at a constant offset. '''
+  if packet.is_const_size():
+    const_size = packet.get_const_size()
+    return (lambda buf, offset: const_size), 0
+
+  size_field = packet.get_size_field()
+  if not size_field:
+    raise ValueError('%s has a custom size' % packet.name)
+
+  field_offset = _find_fixed_field(packet, size_field)
+  unpack_from = field_struct(size_field).unpack_from
+  header_size = field_offset + size_field.get_const_size()
+  padding = packet.get_padding_info()
+  if not padding:
+    return (lambda buf, offset:
+            unpack_from(buf, offset + field_offset)[0]), header_size
+
+  multiple, constant = padding.multiple, padding.constant
+  return (lambda buf, offset:
+          padded_size(unpack_from(buf, offset + field_offset)[0], multiple,
+                      constant)), header_size
+
+def compile_selector(packet):
+  ''' Returns a function of (buf, offset) that returns the most specific
+      subtype of the packet at the offset of the buffer according to the type
+      selectors. The buffer must hold the whole packet. '''
+  conditions = []
+  for child in packet.children:
+    checks = []
+    for field, value in child.get_type_selector_condition():
+      checks.append((field_struct(field).unpack_from,
+                     _find_fixed_field(child, field), value))
+    conditions.append((child, checks, compile_selector(child)))
+
+  def select(buf, offset):
+    ''' Selects the subtype. '''
+    for child, checks, child_select in conditions:
+      for unpack_from, field_offset, value in checks:
+        if unpack_from(buf, offset + field_offset)[0] != value:
+          break
+      else:
+        return child_select(buf, offset)
+    return packet
+
+  if not conditions:
+    return lambda buf, offset: packet
+  return select
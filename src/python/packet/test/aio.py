@@ -0,0 +1,278 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Unit tests for the asyncio adapters. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import importlib
+import os
+import os.path
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+from unittest.case import TestCase
+from unittest.loader import makeSuite
+from unittest.runner import TextTestRunner
+from unittest.suite import TestSuite
+
+from packet import runtime
+from packet.test import get_packet_repo_path
+
+# pylint: disable=C0111
+
+class Message(runtime.Packet):
+  ''' A packet with a 2-byte size field, as generated by the Python target. '''
+  __slots__ = ()
+  MIN_SIZE = 2
+
+  def size(self):
+    if len(self.buf) < 2:
+      return 0
+    return struct.unpack_from('<H', self.buf, 0)[0]
+
+def _message(payload):
+  return struct.pack('<H', 2 + len(payload)) + payload
+
+# The generator runs on Python 2, and the adapters on Python 3.7.
+PYTHON2 = os.environ.get('PACKET_PYTHON2', 'python2')
+
+def _generate_aio(output_dir):
+  ''' Generates simple.py and simple_aio.py in the output directory with the
+      Python 2 generator. Returns False if Python 2 is not available. '''
+  cli = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cli',
+                     'packetgenerator.py')
+  try:
+    proc = subprocess.Popen([PYTHON2, cli, '-l', 'python', '-o', output_dir,
+                             '-p', get_packet_repo_path(), '--aio',
+                             'simple.packet'],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+  except OSError:
+    return False
+  out = proc.communicate()[0]
+  # 127 is returned by shells and shims that cannot find the interpreter.
+  if proc.returncode == 127:
+    return False
+  if proc.returncode:
+    raise AssertionError('Generator failed: %s' % out)
+  return True
+
+class FakeTransport(object):
+  ''' A transport that buffers writes, and pauses its protocol above the high
+      watermark until drained. '''
+  def __init__(self, protocol):
+    self.protocol = protocol
+    self.limits = None
+    self.writes = []
+    self.buffered = 0
+
+  def set_write_buffer_limits(self, high=None, low=None):
+    self.limits = (high, low)
+
+  def is_closing(self):
+    return False
+
+  def write(self, data):
+    self.writes.append(data)
+    self.buffered += len(data)
+    if self.buffered > self.limits[0]:
+      self.protocol.pause_writing()
+
+  def drain(self):
+    self.buffered = 0
+    self.protocol.resume_writing()
+
+class TestAio(TestCase):  # pylint: disable=R0904
+  def setUp(self):  # pylint: disable=C0103
+    if sys.version_info < (3, 7):
+      self.skipTest('asyncio adapters require Python 3.7')
+
+    import asyncio
+    from packet.runtime import aio
+    self.asyncio = asyncio
+    self.aio = aio
+
+  def test_framer(self):
+    framer = self.aio.Framer(Message, buf_size=8)
+    framer.feed(_message(b'ab') + _message(b'c')[:2])
+    packets = framer.frames()
+    self.assertEqual([p.buffer().tobytes() for p in packets],
+                     [_message(b'ab')])
+    self.assertEqual(framer.pending(), 2)
+
+    # Grows the buffer for packets larger than the buffer.
+    framer.feed(_message(b'c')[2:] + _message(b'0123456789'))
+    packets = framer.frames()
+    self.assertEqual([p.buffer().tobytes() for p in packets],
+                     [_message(b'c'), _message(b'0123456789')])
+    self.assertEqual(framer.pending(), 0)
+
+  def test_reader(self):
+    aio = self.aio
+    asyncio = self.asyncio
+
+    class MessageReader(aio.PacketReader):
+      packet_class = Message
+
+    def read(data):
+      loop = asyncio.new_event_loop()
+      try:
+        stream = asyncio.StreamReader(loop=loop)
+        stream.feed_data(data)
+        stream.feed_eof()
+        reader = MessageReader(stream, buf_size=4)
+        res = []
+        while True:
+          packets = loop.run_until_complete(reader.read_packets())
+          if not packets:
+            return res
+          res += [p.buffer().tobytes() for p in packets]
+      finally:
+        loop.close()
+
+    data = _message(b'abc') + _message(b'') + _message(b'xy')
+    self.assertEqual(read(data),
+                     [_message(b'abc'), _message(b''), _message(b'xy')])
+    self.assertRaises(asyncio.IncompleteReadError, read, data[:-1])
+
+  def test_protocol(self):
+    aio = self.aio
+    asyncio = self.asyncio
+    loop = asyncio.new_event_loop()
+    received = []
+
+    class EchoProtocol(aio.PacketProtocol):
+      packet_class = Message
+
+      def packets_received(self, packets):
+        received.append(len(packets))
+        for packet in packets:
+          self.send(packet)
+
+    class ClientProtocol(aio.PacketProtocol):
+      packet_class = Message
+
+      def __init__(self):
+        aio.PacketProtocol.__init__(self)
+        self.echoed = []
+        self.done = loop.create_future()
+
+      def packets_received(self, packets):
+        self.echoed += [p.buffer().tobytes() for p in packets]
+        if len(self.echoed) == 3:
+          self.done.set_result(None)
+
+    try:
+      server = loop.run_until_complete(
+          loop.create_server(EchoProtocol, '127.0.0.1', 0))
+      port = server.sockets[0].getsockname()[1]
+      transport, client = loop.run_until_complete(
+          loop.create_connection(ClientProtocol, '127.0.0.1', port))
+      for payload in [b'a', b'bb', b'ccc']:
+        client.send(Message(bytearray(_message(payload))))
+      loop.run_until_complete(client.drain())
+      loop.run_until_complete(asyncio.wait_for(client.done, 5))
+      transport.close()
+      server.close()
+      loop.run_until_complete(server.wait_closed())
+    finally:
+      loop.close()
+
+    self.assertEqual(client.echoed,
+                     [_message(b'a'), _message(b'bb'), _message(b'ccc')])
+    # The three sends are coalesced into a single write.
+    self.assertEqual(received, [3])
+
+  def test_abstract_protocol(self):
+    self.assertRaises(TypeError, self.aio.PacketProtocol)
+
+  def test_generated(self):
+    asyncio = self.asyncio
+    output_dir = tempfile.mkdtemp()
+    try:
+      if not _generate_aio(output_dir):
+        self.skipTest('Python 2 is required to run the generator')
+      sys.path.insert(0, output_dir)
+      simple = importlib.import_module('simple')
+      simple_aio = importlib.import_module('simple_aio')
+    finally:
+      if output_dir in sys.path:
+        sys.path.remove(output_dir)
+      for name in ['simple', 'simple_aio']:
+        sys.modules.pop(name, None)
+      shutil.rmtree(output_dir)
+
+    received = []
+
+    class Protocol(simple_aio.SimpleProtocol):
+      def packets_received(self, packets):
+        received.append([p.buffer().tobytes() for p in packets])
+        for packet in packets:
+          self.send(packet)
+
+    loop = asyncio.new_event_loop()
+    try:
+      protocol = Protocol(buf_size=2, high_water=2, low_water=1)
+      transport = FakeTransport(protocol)
+      data = b'\x01\x02a\x03bc'
+
+      def receive():
+        protocol.connection_made(transport)
+        for i in range(0, len(data), 3):
+          chunk = data[i:i + 3]
+          buf = protocol.get_buffer(len(chunk))
+          buf[:len(chunk)] = chunk
+          protocol.buffer_updated(len(chunk))
+
+      loop.call_soon(receive)
+      # The echoes are coalesced, and pause writes above the high watermark.
+      drain = loop.create_task(protocol.drain())
+      loop.run_until_complete(asyncio.sleep(0))
+      self.assertEqual(transport.limits, (2, 1))
+      self.assertFalse(drain.done())
+      loop.call_soon(transport.drain)
+      loop.run_until_complete(asyncio.wait_for(drain, 5))
+
+      stream = asyncio.StreamReader(loop=loop)
+      stream.feed_data(data)
+      stream.feed_eof()
+      reader = simple_aio.SimpleReader(stream, buf_size=4)
+      packets = []
+      while True:
+        batch = loop.run_until_complete(reader.read_packets())
+        if not batch:
+          break
+        self.assertTrue(all(isinstance(p, simple.Simple) for p in batch))
+        packets += [p.get_x() for p in batch]
+    finally:
+      loop.close()
+
+    writes = transport.writes
+    self.assertEqual(received, [[b'\x01', b'\x02a'], [b'\x03bc']])
+    self.assertEqual(writes, [b'\x01\x02a\x03bc'])
+    self.assertEqual(packets, [1, 2, 3])
+
+def suite():
+  test_suite = TestSuite()
+  test_suite.addTest(makeSuite(TestAio))
+  return test_suite
+
+if __name__ == '__main__':
+  TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,121 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Unit tests for the capture file scanner. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import os.path
+import shutil
+import struct
+import tempfile
+from unittest.case import TestCase
+from unittest.loader import makeSuite
+from unittest.runner import TextTestRunner
+from unittest.suite import TestSuite
+
+from packet import runtime
+from packet.runtime.capture import CaptureFile
+
+# pylint: disable=C0111
+
+class Message(runtime.Packet):
+  ''' A packet with a 2-byte size field, as generated by the Python target. '''
+  __slots__ = ()
+  MIN_SIZE = 2
+
+  def size(self):
+    if len(self.buf) < 2:
+      return 0
+    return struct.unpack_from('<H', self.buf, 0)[0]
+
+def _message(payload):
+  return struct.pack('<H', 2 + len(payload)) + payload
+
+class TestCaptureFile(TestCase):  # pylint: disable=R0904
+  def setUp(self):  # pylint: disable=C0103
+    self.dir = tempfile.mkdtemp()
+    self.path = os.path.join(self.dir, 'capture.bin')
+    self.messages = [_message(b'a' * i) for i in range(10)]
+    self._write(b''.join(self.messages))
+
+  def tearDown(self):  # pylint: disable=C0103
+    shutil.rmtree(self.dir)
+
+  def _write(self, data):
+    capture = open(self.path, 'wb')
+    capture.write(data)
+    capture.close()
+
+  def test_scan(self):
+    with CaptureFile(self.path, Message) as capture:
+      self.assertEqual([p.buffer().tobytes() for p in capture], self.messages)
+      offsets = [o for o, _ in capture.scan()]
+      self.assertEqual(offsets[:3], [0, 2, 5])
+
+  def test_truncated(self):
+    self._write(b''.join(self.messages) + _message(b'xyz')[:3])
+    with CaptureFile(self.path, Message) as capture:
+      self.assertEqual(len(list(capture)), 10)
+
+  def test_empty(self):
+    self._write(b'')
+    with CaptureFile(self.path, Message) as capture:
+      self.assertEqual(list(capture), [])
+      self.assertEqual(len(capture), 0)
+
+  def test_index(self):
+    with CaptureFile(self.path, Message) as capture:
+      self.assertIsNone(capture.load_index())
+      self.assertEqual(len(capture), 10)
+      self.assertEqual(capture[7].buffer().tobytes(), self.messages[7])
+    self.assertTrue(os.path.exists(self.path + '.idx'))
+
+    with CaptureFile(self.path, Message) as capture:
+      offsets = capture.load_index()
+      self.assertEqual(list(offsets)[:3], [0, 2, 5])
+      self.assertEqual(capture[-1].buffer().tobytes(), self.messages[-1])
+
+  def test_stale_index(self):
+    with CaptureFile(self.path, Message) as capture:
+      capture.build_index()
+
+    self._write(b''.join(self.messages[:5]))
+    with CaptureFile(self.path, Message) as capture:
+      self.assertIsNone(capture.load_index())
+      self.assertEqual(len(capture), 5)
+
+  def test_rewritten_index(self):
+    os.utime(self.path, (1000, 1000))
+    with CaptureFile(self.path, Message) as capture:
+      capture.build_index()
+
+    # The same size and modification time, but different frames.
+    self._write(b''.join(reversed(self.messages)))
+    os.utime(self.path, (1000, 1000))
+    with CaptureFile(self.path, Message) as capture:
+      self.assertIsNone(capture.load_index())
+      self.assertEqual(capture[0].buffer().tobytes(), self.messages[-1])
+
+def suite():
+  test_suite = TestSuite()
+  test_suite.addTest(makeSuite(TestCaptureFile))
+  return test_suite
+
+if __name__ == '__main__':
+  TextTestRunner(verbosity=2).run(suite())
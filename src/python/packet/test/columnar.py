@@ -0,0 +1,143 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Unit tests for the columnar batch decoder. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import io
+import struct
+from unittest.case import TestCase
+from unittest.loader import makeSuite
+from unittest.runner import TextTestRunner
+from unittest.suite import TestSuite
+
+from packet import boot_packet
+from packet.parser.model import parse_string
+from packet.runtime.columnar import ColumnarDecoder
+from packet.runtime.schema import prepare
+from packet.test import get_packet_repo_path
+
+# pylint: disable=C0111
+
+MESSAGES = '''
+@bigendian
+packet Header {
+  uint8 type;
+  @size uint16 length;
+  uint32 xid;
+}
+
+@type_selector(type = 1)
+packet Echo(Header) {
+  @repeated uint8 data;
+}
+
+@type_selector(type = 2)
+packet Stats(Header) {
+  uint64 packets;
+  uint16 port;
+}
+'''
+
+MIXED = '''
+packet Frame {
+  uint8 type;
+  @size uint16 length;
+}
+
+@bigendian
+@type_selector(type = 1)
+packet Sample(Frame) {
+  uint32 value;
+}
+'''
+
+def _echo(xid, data):
+  return struct.pack('>BHI', 1, 7 + len(data), xid) + data
+
+def _stats(xid, packets, port):
+  return struct.pack('>BHIQH', 2, 17, xid, packets, port)
+
+class TestColumnarDecoder(TestCase):  # pylint: disable=R0904
+  def __init__(self, method_name):
+    TestCase.__init__(self, method_name)
+    boot_packet(get_packet_repo_path())
+
+  def setUp(self):  # pylint: disable=C0103
+    self.pom = prepare(parse_string(MESSAGES, 'messages'))
+    self.header = self.pom.packets['Header']
+    self.stream = b''.join([_echo(1, b'abc'), _stats(2, 1 << 40, 80),
+                            _echo(3, b''), _stats(4, 5, 443)])
+
+  def test_decode_buffer(self):
+    decoder = ColumnarDecoder(self.header)
+    batch, consumed = decoder.decode_buffer(self.stream[:-1])
+    self.assertEqual(consumed, len(self.stream) - 17)
+    self.assertEqual(batch.count, 3)
+    self.assertEqual(list(batch.columns['Echo']['xid']), [1, 3])
+    self.assertEqual(list(batch.columns['Stats']['packets']), [1 << 40])
+    self.assertEqual(list(batch.offsets['Echo']), [0, 27])
+
+  def test_decode_stream(self):
+    decoder = ColumnarDecoder(self.header, fields=['xid', 'port'],
+                              chunk_size=8)
+    xids = []
+    ports = []
+    for batch in decoder.decode(io.BytesIO(self.stream)):
+      self.assertFalse('length' in batch.columns.get('Echo', {}))
+      xids += list(batch.columns.get('Echo', {}).get('xid', []))
+      xids += list(batch.columns.get('Stats', {}).get('xid', []))
+      ports += list(batch.columns.get('Stats', {}).get('port', []))
+    self.assertEqual(sorted(xids), [1, 2, 3, 4])
+    self.assertEqual(ports, [80, 443])
+
+  def test_mixed_endian(self):
+    frame = prepare(parse_string(MIXED, 'mixed')).packets['Frame']
+    decoder = ColumnarDecoder(frame)
+    stream = struct.pack('<BH', 1, 7) + struct.pack('>I', 0x01020304)
+    batch, _ = decoder.decode_buffer(stream)
+    self.assertEqual(list(batch.columns['Sample']['length']), [7])
+    self.assertEqual(list(batch.columns['Sample']['value']), [0x01020304])
+
+  def test_invalid_fields(self):
+    self.assertRaises(ValueError, ColumnarDecoder, self.header,
+                      fields=['xid', 'unknown'])
+    self.assertRaises(ValueError, ColumnarDecoder, self.header,
+                      fields=['data'])
+
+  def test_truncated(self):
+    decoder = ColumnarDecoder(self.header)
+    stream = io.BytesIO(self.stream[:-1])
+    self.assertRaises(ValueError, list, decoder.decode(stream))
+
+  def test_short_frame(self):
+    decoder = ColumnarDecoder(self.header)
+    stats = struct.pack('>BHI', 2, 7, 2)
+    self.assertRaises(ValueError, decoder.decode_buffer,
+                      stats + _echo(3, b'abcdefghij'))
+    header = struct.pack('>BH', 1, 2)
+    self.assertRaises(ValueError, decoder.decode_buffer, header + self.stream)
+
+def suite():
+  test_suite = TestSuite()
+  test_suite.addTest(makeSuite(TestColumnarDecoder))
+  return test_suite
+
+if __name__ == '__main__':
+  TextTestRunner(verbosity=2).run(suite())
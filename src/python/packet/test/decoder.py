@@ -0,0 +1,128 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Unit tests for the runtime decoder. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import struct
+from unittest.case import TestCase
+from unittest.loader import makeSuite
+from unittest.runner import TextTestRunner
+from unittest.suite import TestSuite
+
+from packet import boot_packet
+from packet.parser.model import parse_file
+from packet.parser.model import parse_string
+from packet.runtime.decoder import compile_schema
+from packet.runtime.decoder import schema_hash
+from packet.test import get_packet_repo_path
+
+# pylint: disable=C0111
+
+MESSAGES = '''
+@bigendian
+packet Header {
+  uint8 type;
+  @size uint16 length;
+}
+
+@type_selector(type = 1)
+packet Echo(Header) {
+  @count(data) uint8 count;
+  @repeated uint16 data;
+  uint32 xid;
+}
+'''
+
+class TestDecoder(TestCase):  # pylint: disable=R0904
+  def __init__(self, method_name):
+    TestCase.__init__(self, method_name)
+    boot_packet(get_packet_repo_path())
+
+  def setUp(self):  # pylint: disable=C0103
+    self.schema = compile_schema(parse_file('including.packet'))
+
+  def test_classes(self):
+    including = self.schema['Including']
+    self.assertTrue(issubclass(including, self.schema['simple.SimpleParent']))
+    self.assertEqual(including.MIN_SIZE, 2)
+    self.assertRaises(KeyError, self.schema.__getitem__, 'SimpleParent')
+
+  def test_getters(self):
+    pkt = self.schema['Including'](bytearray([2, 4, 1, 1]))
+    self.assertEqual(pkt.get_c(), 2)
+    self.assertEqual(pkt.size(), 4)
+    self.assertEqual([s.get_x() for s in pkt.get_s()], [1, 1])
+
+    pkt = self.schema['AnotherIncluding'](bytearray([1, 4, 7, 8]))
+    self.assertEqual(pkt.get_arr(), (7, 8))
+
+    pkt = self.schema['YetAnotherIncluding'](bytearray([16, 4, 3, 2]))
+    self.assertEqual(pkt.get_single_s().get_c(), 3)
+    self.assertEqual(pkt.single_s_size(), 2)
+
+    pkt = self.schema['DerivedBigEndian'](bytearray([0, 1, 0, 2, 1, 2, 3, 4,
+                                                     5]))
+    self.assertEqual(pkt.get_c(), 0x01020304)
+    self.assertEqual(pkt.get_d(), 5)
+    self.assertEqual(pkt.size(), 9)
+
+  def test_dynamic_offsets(self):
+    schema = compile_schema(parse_string(MESSAGES, 'messages'))
+    buf = struct.pack('>BHBHHI', 1, 12, 2, 10, 20, 42)
+    echo = schema['Echo'](buf)
+    self.assertEqual(echo.get_data(), (10, 20))
+    self.assertEqual(echo.data_size(), 4)
+    self.assertEqual(echo.xid_offset(), 8)
+    self.assertEqual(echo.get_xid(), 42)
+
+  def test_signed_bytes(self):
+    pkt = self.schema['simple.YetYetAnotherSimple'](bytearray([4, 5, 2, 255,
+                                                               5]))
+    self.assertEqual(pkt.get_simples(), (-1, 5))
+
+  def test_select(self):
+    buf = bytearray([2, 4, 1, 1, 16, 4, 3, 2, 9, 2])
+    pkt = self.schema.decode('simple.SimpleParent', buf)
+    self.assertEqual(type(pkt).__name__, 'Including')
+    self.assertTrue(self.schema['Including'].matches(pkt))
+    self.assertFalse(self.schema['AnotherIncluding'].matches(pkt))
+    self.assertRaises(ValueError, self.schema['AnotherIncluding'].cast, pkt)
+
+    names = [(o, type(p).__name__)
+             for o, p in self.schema.iter_packets('simple.SimpleParent', buf)]
+    self.assertEqual(names, [(0, 'Including'), (4, 'YetAnotherIncluding'),
+                             (8, 'SimpleParent')])
+
+  def test_cache(self):
+    pom = parse_string(MESSAGES, 'messages')
+    other = parse_string(MESSAGES, 'messages')
+    self.assertTrue(compile_schema(pom) is compile_schema(other))
+    changed = parse_string(MESSAGES.replace('uint32 xid', 'uint64 xid'),
+                           'messages')
+    self.assertNotEqual(schema_hash(compile_schema(changed).pom),
+                        schema_hash(pom))
+
+def suite():
+  test_suite = TestSuite()
+  test_suite.addTest(makeSuite(TestDecoder))
+  return test_suite
+
+if __name__ == '__main__':
+  TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,84 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Unit tests for the dependency index. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+from unittest.case import TestCase
+from unittest.loader import makeSuite
+from unittest.runner import TextTestRunner
+from unittest.suite import TestSuite
+
+from packet import boot_packet
+from packet.parser.dependency import DependencyIndex
+from packet.parser.model import parse_file
+from packet.test import get_packet_repo_path
+
+# pylint: disable=C0111
+
+class TestDependencyIndex(TestCase):  # pylint: disable=R0904
+  def __init__(self, method_name):
+    TestCase.__init__(self, method_name)
+    boot_packet(get_packet_repo_path())
+
+  def setUp(self):  # pylint: disable=C0103
+    self.index = DependencyIndex([parse_file('including.packet')])
+    self.simple = self.index.find_pom('simple.packet')
+    self.including = self.index.find_pom('including')
+
+  def test_find_pom(self):
+    self.assertEqual(self.simple.namespace, 'simple')
+    self.assertEqual(self.including.namespace, 'including')
+    self.assertIsNone(self.index.find_pom('nosuchfile.packet'))
+
+  def test_extenders(self):
+    parent = self.simple.packets['SimpleParent']
+    names = [p.name for p in self.index.extenders(parent)]
+    self.assertEqual(names, ['AnotherSimple', 'YetAnotherSimple',
+                             'YetYetAnotherSimple', 'Including',
+                             'AnotherIncluding', 'YetAnotherIncluding'])
+
+  def test_embedders(self):
+    fields = self.index.embedders(self.simple.packets['Simple'])
+    names = [(f.packet.name, f.name) for f in fields]
+    self.assertEqual(names, [('AnotherSimple', 'y'),
+                             ('YetAnotherSimple', 'simples'),
+                             ('Including', 's')])
+
+  def test_includers(self):
+    self.assertEqual(self.index.includers(self.simple), [self.including])
+    self.assertEqual(self.index.includers(self.including), [])
+
+  def test_affected(self):
+    self.assertEqual(self.index.affected_namespaces(self.simple),
+                     ['simple', 'including'])
+    self.assertEqual(self.index.affected_namespaces(self.including),
+                     ['simple', 'including'])
+
+    affected = self.index.affected_packets(self.including)
+    self.assertEqual([p.pom.namespace for p in affected],
+                     ['including'] * len(affected))
+
+def suite():
+  test_suite = TestSuite()
+  test_suite.addTest(makeSuite(TestDependencyIndex))
+  return test_suite
+
+if __name__ == '__main__':
+  TextTestRunner(verbosity=2).run(suite())
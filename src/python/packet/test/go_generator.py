@@ -0,0 +1,76 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Unit tests for the Go generator. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+from unittest.case import TestCase
+from unittest.loader import makeSuite
+from unittest.runner import TextTestRunner
+from unittest.suite import TestSuite
+
+from packet import boot_packet
+from packet.generator.go import check_kind_names
+from packet.parser.model import parse_string
+from packet.test import get_packet_repo_path
+
+# pylint: disable=C0111
+
+DISPATCH = '''
+packet Header {
+  uint8 type;
+  uint8 len;
+}
+
+@type_selector(type = 1)
+packet %s(Header) {
+}
+
+@type_selector(type = 2)
+packet Other(Header) {
+}
+'''
+
+class TestGoGenerator(TestCase):  # pylint: disable=R0904
+  def __init__(self, method_name):
+    TestCase.__init__(self, method_name)
+    boot_packet(get_packet_repo_path())
+
+  def test_kind_names(self):
+    check_kind_names(parse_string(DISPATCH % 'Known', 'dispatch'))
+    for name in ['Unknown', 'Kind', 'KindOther']:
+      self.assertRaises(ValueError, check_kind_names,
+                        parse_string(DISPATCH % name, 'dispatch'))
+
+  def test_kind_enum_names(self):
+    for enum in ['enum Kind { A = 1 }', 'enum Type { KindOther = 1 }',
+                 'enum kind { A = 1 }']:
+      self.assertRaises(ValueError, check_kind_names,
+                        parse_string(DISPATCH % 'Known' + enum, 'dispatch'))
+
+  def test_no_dispatch(self):
+    check_kind_names(parse_string('packet Kind {\n  uint8 a;\n}\n', 'kind'))
+
+def suite():
+  test_suite = TestSuite()
+  test_suite.addTest(makeSuite(TestGoGenerator))
+  return test_suite
+
+if __name__ == '__main__':
+  TextTestRunner(verbosity=2).run(suite())
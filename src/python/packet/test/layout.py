@@ -0,0 +1,103 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Unit tests for the field access-cost analysis. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+from unittest.case import TestCase
+from unittest.loader import makeSuite
+from unittest.runner import TextTestRunner
+from unittest.suite import TestSuite
+
+from packet import boot_packet
+from packet.generator import layout
+from packet.generator.processor import OffsetProcessor
+from packet.generator.processor import SizeProcessor
+from packet.parser.model import parse_string
+from packet.test import get_packet_repo_path
+
+# pylint: disable=C0111
+
+STATS = '''
+packet Elem {
+  @size uint16 len;
+  uint32 v;
+}
+
+packet Stats {
+  @size uint16 length;
+  @count(ports) uint8 nports;
+  @size(flows) uint8 flows_len;
+  @repeated Elem ports;
+  @repeated Elem flows;
+  uint32 xid;
+  Elem trailer;
+  uint32 hot;
+}
+'''
+
+class TestLayout(TestCase):  # pylint: disable=R0904
+  def __init__(self, method_name):
+    TestCase.__init__(self, method_name)
+    boot_packet(get_packet_repo_path())
+
+  def setUp(self):  # pylint: disable=C0103
+    self.pom = parse_string(STATS, 'stats')
+    SizeProcessor().process(self.pom)
+    OffsetProcessor().process(self.pom)
+    self.costs = dict((c.field.name, c) for c in layout.analyze(self.pom))
+
+  def test_constant_offsets(self):
+    for name in ['length', 'nports', 'flows_len', 'ports']:
+      self.assertEqual(self.costs[name].hops, [])
+      self.assertEqual(self.costs[name].get_complexity(), 'O(1)')
+
+  def test_hops(self):
+    kinds = [k for _, k in self.costs['hot'].hops]
+    self.assertEqual(kinds, [layout.HOP_KINDS.COUNT,
+                             layout.HOP_KINDS.SIZE_FIELD,
+                             layout.HOP_KINDS.SUB_PACKET])
+    self.assertEqual(self.costs['hot'].get_complexity(), 'O(n)')
+    self.assertEqual(self.costs['flows'].get_complexity(), 'O(n)')
+
+  def test_rank(self):
+    ranked = [c.field.name for c in layout.analyze(self.pom)]
+    self.assertEqual(ranked[0], 'hot')
+    self.assertEqual(sorted(ranked[1:3]), ['trailer', 'xid'])
+    self.assertGreater(self.costs['hot'].calls, self.costs['xid'].calls)
+
+  def test_suggestions(self):
+    suggestions = self.costs['xid'].suggestions
+    self.assertEqual(len(suggestions), 2)
+    self.assertTrue('@size(ports)' in suggestions[0])
+    self.assertTrue('move xid before ports' in suggestions[1])
+    self.assertEqual(len(self.costs['trailer'].suggestions), 1)
+
+  def test_report(self):
+    lines = layout.format_report(layout.analyze(self.pom))
+    self.assertTrue(lines[0].startswith('stats.Stats.hot: O(n), 3 hop(s)'))
+    self.assertFalse([l for l in lines if l.startswith('stats.Stats.length')])
+
+def suite():
+  test_suite = TestSuite()
+  test_suite.addTest(makeSuite(TestLayout))
+  return test_suite
+
+if __name__ == '__main__':
+  TextTestRunner(verbosity=2).run(suite())
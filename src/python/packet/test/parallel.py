@@ -0,0 +1,129 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Unit tests for parallel capture decoding. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import os.path
+import shutil
+import struct
+import tempfile
+from unittest.case import TestCase
+from unittest.loader import makeSuite
+from unittest.runner import TextTestRunner
+from unittest.suite import TestSuite
+
+from packet import runtime
+from packet.runtime import parallel
+from packet.runtime.capture import CaptureFile
+
+# pylint: disable=C0111
+
+class Message(runtime.Packet):
+  ''' A packet with a 2-byte size field, as generated by the Python target. '''
+  __slots__ = ()
+  MIN_SIZE = 2
+
+  def size(self):
+    if len(self.buf) < 2:
+      return 0
+    return struct.unpack_from('<H', self.buf, 0)[0]
+
+  @staticmethod
+  def frame_size(buf, offset=0):
+    return struct.unpack_from('<H', buf, offset)[0]
+
+def _message(payload):
+  return struct.pack('<H', 2 + len(payload)) + payload
+
+def _payload_if_even(packet):
+  payload = packet.buffer()[2:].tobytes()
+  return payload if len(payload) % 2 == 0 else None
+
+def _count_bytes(acc, packet):
+  return (acc[0] + 1, acc[1] + packet.size())
+
+def _add(acc1, acc2):
+  return (acc1[0] + acc2[0], acc1[1] + acc2[1])
+
+class TestParallel(TestCase):  # pylint: disable=R0904
+  def setUp(self):  # pylint: disable=C0103
+    self.dir = tempfile.mkdtemp()
+    self.path = os.path.join(self.dir, 'capture.bin')
+    self.payloads = [b'x' * (i % 7) for i in range(100)]
+    capture = open(self.path, 'wb')
+    capture.write(b''.join(_message(p) for p in self.payloads))
+    capture.close()
+
+  def tearDown(self):  # pylint: disable=C0103
+    shutil.rmtree(self.dir)
+
+  def test_chunks(self):
+    with CaptureFile(self.path, Message) as capture:
+      chunks = parallel.get_chunks(capture, 8)
+      self.assertEqual(len(chunks), 8)
+      self.assertEqual(chunks[0][0], 0)
+      self.assertEqual(chunks[-1][1], capture.size)
+      offsets = set(capture.index())
+      for start, end in chunks:
+        self.assertTrue(start in offsets)
+        self.assertTrue(end in offsets or end == capture.size)
+
+  def test_scan_without_index(self):
+    with CaptureFile(self.path, Message) as capture:
+      chunks = parallel.get_chunks(capture, 8)
+      self.assertEqual(chunks[0][0], 0)
+      self.assertEqual(chunks[-1][1], capture.size)
+    self.assertFalse(os.path.exists(self.path + '.idx'))
+
+    results = parallel.map_capture(self.path, Message, _payload_if_even,
+                                   processes=2)
+    self.assertEqual(results, [p for p in self.payloads if len(p) % 2 == 0])
+    self.assertFalse(os.path.exists(self.path + '.idx'))
+
+  def test_unwritable_index(self):
+    index_path = os.path.join(self.dir, 'missing', 'capture.idx')
+    count, _ = parallel.reduce_capture(self.path, Message, _count_bytes,
+                                       _add, (0, 0), processes=2,
+                                       index_path=index_path)
+    self.assertEqual(count, 100)
+
+    index_path = os.path.join(self.dir, 'capture.idx')
+    parallel.map_capture(self.path, Message, _payload_if_even, processes=2,
+                         index_path=index_path)
+    self.assertTrue(os.path.exists(index_path))
+
+  def test_map(self):
+    results = parallel.map_capture(self.path, Message, _payload_if_even,
+                                   processes=3)
+    self.assertEqual(results, [p for p in self.payloads if len(p) % 2 == 0])
+
+  def test_reduce(self):
+    count, size = parallel.reduce_capture(self.path, Message, _count_bytes,
+                                          _add, (0, 0), processes=3)
+    self.assertEqual(count, 100)
+    self.assertEqual(size, os.path.getsize(self.path))
+
+def suite():
+  test_suite = TestSuite()
+  test_suite.addTest(makeSuite(TestParallel))
+  return test_suite
+
+if __name__ == '__main__':
+  TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,263 @@
+#
+# Copyright (c) 2014, The Packet project authors. All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# The GNU General Public License is contained in the file LICENSE.
+#
+''' Unit tests for the Python generator and the generated code. '''
+
+__author__ = 'Soheil Hassas Yeganeh <soheil@cs.toronto.edu>'
+
+import os.path
+import shutil
+import sys
+import tempfile
+from unittest.case import TestCase
+from unittest.loader import makeSuite
+from unittest.runner import TextTestRunner
+from unittest.suite import TestSuite
+
+from packet import boot_packet
+from packet import runtime
+from packet.generator.base import BENCHMARK_OPT_NAME
+from packet.generator.base import RECURSIVE_OPT_NAME
+from packet.generator.processor import EndianProcessor
+from packet.generator.processor import OffsetProcessor
+from packet.generator.processor import SizeProcessor
+from packet.generator.python import PythonGenerator
+from packet.parser.model import parse_string
+from packet.test import get_packet_repo_path
+
+try:
+  import numpy  # pylint: disable=F0401
+except ImportError:
+  numpy = None  # pylint: disable=C0103
+
+PORT_STATS = '''
+packet Counter {
+  uint32 packets;
+  uint64 bytes;
+}
+
+@bigendian
+packet PortStats {
+  uint16 port;
+  @repeated(count = 2) uint8 pad;
+  Counter rx;
+  @repeated(count = 2) Counter tx;
+}
+'''
+
+# pylint: disable=C0111
+
+class TestPythonGenerator(TestCase):  # pylint: disable=R0904
+  def __init__(self, method_name):
+    TestCase.__init__(self, method_name)
+    boot_packet(get_packet_repo_path())
+
+  def setUp(self):  # pylint: disable=C0103
+    self.output_dir = tempfile.mkdtemp()
+    PythonGenerator().generate('including.packet', self.output_dir,
+                               {RECURSIVE_OPT_NAME: True,
+                                BENCHMARK_OPT_NAME: True})
+    sys.path.insert(0, self.output_dir)
+    self.simple = __import__('simple')
+    self.including = __import__('including')
+
+  def tearDown(self):  # pylint: disable=C0103
+    sys.path.remove(self.output_dir)
+    for name in ['simple', 'including', 'including_bench', 'portstats']:
+      sys.modules.pop(name, None)
+    shutil.rmtree(self.output_dir)
+
+  def test_output_files(self):
+    for name in ['simple', 'simple_bench', 'including', 'including_bench']:
+      self.assertTrue(os.path.exists(os.path.join(self.output_dir,
+                                                  name + '.py')))
+    # The asyncio adapters require Python 3.7, and are only generated on
+    # demand.
+    for name in ['simple_aio', 'including_aio']:
+      self.assertFalse(os.path.exists(os.path.join(self.output_dir,
+                                                   name + '.py')))
+
+  def test_view(self):
+    buf = bytearray([2, 4, 1, 1])
+    pkt = self.including.Including(buf)
+    self.assertEqual(pkt.get_c(), self.including.TestEnum.ITEM1)
+    self.assertEqual(pkt.size(), 4)
+    self.assertEqual(self.including.Including.frame_size(buf), 4)
+    self.assertEqual(self.including.Including.frame_size(b'\0' + buf, 1), 4)
+    self.assertEqual([s.get_x() for s in pkt.get_s()], [1, 1])
+    self.assertEqual(pkt.unpack_fixed(), (2, 4))
+
+    # Views share the buffer.
+    pkt.get_s()[1].set_x(0)
+    self.assertEqual(buf[3], 0)
+
+  def test_cast(self):
+    parent = self.simple.SimpleParent(bytearray([2, 2]))
+    self.assertTrue(self.including.Including.matches(parent))
+    self.assertFalse(self.including.AnotherIncluding.matches(parent))
+    self.assertEqual(self.including.Including.cast(parent).size(), 2)
+    self.assertRaises(ValueError, self.including.AnotherIncluding.cast,
+                      parent)
+
+  def test_new(self):
+    pkt = self.including.Including.new()
+    self.assertEqual(pkt.buffer().tobytes(), bytes(bytearray([2, 2])))
+    simple = self.simple.Simple.new()
+    pkt.add_s(simple)
+    pkt.add_s(simple)
+    self.assertEqual(pkt.buffer().tobytes(), bytes(bytearray([2, 4, 1, 1])))
+
+  def test_encode(self):
+    simple = self.simple.Simple.new()
+    messages = [
+        (self.including.Including, {'s': [simple]}),
+        (self.including.AnotherIncluding, {'arr': (7, 8)}),
+        (self.including.Including, {}),
+        (self.simple.YetAnotherSimple, {'simples': [simple, simple]}),
+        (self.simple.YetYetAnotherSimple, {'simples': (-1, 5)}),
+        (self.including.YetAnotherIncluding,
+         {'single_s': self.simple.SimpleParent.new()}),
+    ]
+    self.assertEqual([cls.encoded_size(values) for cls, values in messages],
+                     [3, 4, 2, 5, 5, 4])
+    encoded = runtime.encode(messages)
+    self.assertTrue(isinstance(encoded, memoryview))
+    self.assertEqual(encoded.tobytes(), bytes(bytearray([
+        2, 3, 1,
+        1, 4, 7, 8,
+        2, 2,
+        3, 5, 2, 1, 1,
+        4, 5, 2, 255, 5,
+        16, 4, 0, 2])))
+    self.assertEqual(runtime.encode([]).tobytes(), b'')
+    self.assertRaises(TypeError, runtime.encode, [(runtime.Packet, {})])
+    # Derived and unknown fields cannot be given.
+    self.assertRaises(ValueError, runtime.encode,
+                      [(self.simple.YetYetAnotherSimple, {'s': 2})])
+    self.assertRaises(ValueError, runtime.encode,
+                      [(self.including.Including, {'unknown': 1})])
+
+    # The encoded packets can be read back with their getters.
+    pkt = self.simple.YetAnotherSimple(encoded[9:14])
+    self.assertEqual([s.size() for s in pkt.get_simples()], [1, 1])
+
+  def test_new_batch(self):
+    packets, buf = self.including.DerivedBigEndian.new_batch(
+        [{'c': i} for i in range(3)])
+    self.assertEqual(len(buf), 27)
+    records = [self.including.DerivedBigEndian(buf[i:i + 9])
+               for i in range(0, 27, 9)]
+    self.assertEqual([r.get_a() for r in records], [1, 1, 1])
+    self.assertEqual([r.get_c() for r in records], [0, 1, 2])
+
+    # Setters write in place.
+    packets[1].set_d(7)
+    self.assertEqual(records[1].get_d(), 7)
+
+  def test_new_batch_grow(self):
+    packets, buf = self.including.Including.new_batch([{}, {}])
+    self.assertTrue(packets[0].batched)
+    self.assertRaises(ValueError, packets[0].add_s, self.simple.Simple.new())
+    self.assertEqual(buf.tobytes(), bytes(bytearray([2, 2, 2, 2])))
+
+    # Packets that are not batched are moved to a larger buffer.
+    pkt = self.including.Including(buf[:2].tobytes())
+    pkt.add_s(self.simple.Simple.new())
+    self.assertEqual(pkt.buffer().tobytes(), bytes(bytearray([2, 3, 1])))
+
+  def test_signed_bytes(self):
+    pkt = self.simple.YetYetAnotherSimple.new()
+    pkt.add_simples(-1)
+    pkt.add_simples(5)
+    self.assertEqual(pkt.get_simples(), (-1, 5))
+
+  def test_const_size_array(self):
+    pkt = self.including.AnotherIncluding.new()
+    pkt.set_arr((7, 8))
+    self.assertEqual(pkt.get_arr(), (7, 8))
+    self.assertEqual(pkt.buffer().tobytes(), bytes(bytearray([1, 4, 7, 8])))
+
+  def test_big_endian(self):
+    pkt = self.including.DerivedBigEndian.new()
+    pkt.set_c(0x01020304)
+    self.assertEqual(pkt.get_a(), 1)
+    self.assertEqual(pkt.buffer()[4:8].tobytes(), bytes(bytearray([1, 2, 3, 4])))
+    self.assertEqual(pkt.unpack_fixed(), (1, 0, 0x01020304, 0))
+
+  def test_dynamic_array(self):
+    pkt = self.simple.YetYetAnotherSimple.new()
+    pkt.add_simples(5)
+    pkt.add_simples(6)
+    self.assertEqual(pkt.get_s(), 2)
+    self.assertEqual(pkt.size(), 5)
+    self.assertEqual(pkt.get_simples(), (5, 6))
+
+  def test_dtype(self):
+    if numpy is None:
+      self.skipTest('numpy is not installed')
+
+    dtype = self.including.DerivedBigEndian.DTYPE
+    self.assertEqual(dtype.itemsize, 9)
+    self.assertEqual(dtype.fields['c'][1], 4)
+    self.assertIsNone(self.including.Including.DTYPE)
+
+    buf = bytearray()
+    for i in range(3):
+      pkt = self.including.DerivedBigEndian.new()
+      pkt.set_c(i)
+      buf += pkt.buffer().tobytes()
+    records = self.including.DerivedBigEndian.frombuffer(buf)
+    self.assertEqual(list(records['a']), [1, 1, 1])
+    self.assertEqual(list(records['c']), [0, 1, 2])
+    self.assertEqual(len(self.including.DerivedBigEndian.frombuffer(
+        buf, count=1, offset=9)), 1)
+    self.assertRaises(TypeError, self.including.Including.frombuffer, buf)
+
+  def test_nested_dtype(self):
+    if numpy is None:
+      self.skipTest('numpy is not installed')
+
+    pom = parse_string(PORT_STATS, 'portstats')
+    for processor in [SizeProcessor(), OffsetProcessor(), EndianProcessor()]:
+      processor.process(pom)
+    PythonGenerator().generate_packet(pom, self.output_dir, {})
+    portstats = __import__('portstats')
+
+    pkt = portstats.PortStats.new()
+    pkt.set_port(7)
+    pkt.get_rx().set_bytes(1 << 40)
+    pkt.get_tx()[1].set_packets(3)
+    records = portstats.PortStats.frombuffer(pkt.buffer().tobytes() * 2)
+    self.assertEqual(records.dtype.itemsize, pkt.size())
+    self.assertEqual(list(records['port']), [7, 7])
+    self.assertEqual(records['rx']['bytes'][1], 1 << 40)
+    self.assertEqual(records['tx']['packets'][0][1], 3)
+
+  def test_benchmark(self):
+    bench = __import__('including_bench')
+    for bench_func in bench.BENCHMARKS:
+      for _, generated, naive in bench_func(10):
+        self.assertTrue(generated >= 0 and naive >= 0)
+
+def suite():
+  test_suite = TestSuite()
+  test_suite.addTest(makeSuite(TestPythonGenerator))
+  return test_suite
+
+if __name__ == '__main__':
+  TextTestRunner(verbosity=2).run(suite())